@@ -0,0 +1,150 @@
+import argparse
+import socket
+import sys
+import threading
+import pygame
+from constants import WIDTH, HEIGHT, FPS, CELL_SIZE, BLACK, WHITE, STREAM_PORT
+from server import HEADER, FrameDecoder
+from viewport import Viewport, mask_regions
+
+
+def _recv_exact(sock, n):
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("server closed the connection")
+        data += chunk
+    return bytes(data)
+
+
+def read_message(sock):
+    kind, generation, length = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    return kind, generation, _recv_exact(sock, length)
+
+
+def connect(host="127.0.0.1", port=STREAM_PORT, unix_path=None):
+    if unix_path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(unix_path)
+    else:
+        sock = socket.create_connection((host, port))
+    return sock
+
+
+class StreamReader(threading.Thread):
+    """
+    Nit, ki bere sporočila s strežnika in hrani zadnjo prejeto sličico.
+    Glavna zanka pygame tako riše s svojo hitrostjo, ne glede na hitrost simulacije.
+    Iz delt sproti zbira tudi spremenjene ploščice od zadnjega prevzema (None: vse, npr. po keyframe),
+    da pogledu ni treba primerjati celih mrež v glavni niti.
+    """
+
+    def __init__(self, sock):
+        super().__init__(daemon=True)
+        self.sock = sock
+        self.decoder = FrameDecoder()
+        self.lock = threading.Lock()
+        self.latest = None
+        self.regions = None
+        self.connected = True
+
+    def run(self):
+        try:
+            while True:
+                kind, generation, payload = read_message(self.sock)
+                if self.decoder.feed(kind, generation, payload):
+                    regions = None
+                    if self.decoder.delta is not None:
+                        rows, cols = self.decoder.hello["rows"], self.decoder.hello["cols"]
+                        changed = self.decoder.delta[:rows * cols].reshape(rows, cols) != 0
+                        regions = mask_regions(changed)
+                    with self.lock:
+                        if self.latest is None:
+                            self.regions = regions
+                        elif self.regions is not None and regions is not None:
+                            self.regions = self.regions + regions
+                        else:
+                            self.regions = None
+                        self.latest = self.decoder.generation, self.decoder.frame
+        except (ConnectionError, OSError):
+            self.connected = False
+
+    def take(self):
+        with self.lock:
+            latest, self.latest = self.latest, None
+            regions, self.regions = self.regions, None
+        return latest, regions
+
+
+def draw_frame(screen, engine, grid, water, viewport):
+    """Nariše dekodirano sličico z obstoječimi funkcijami za risanje posameznega pogona."""
+    if engine == "twod":
+        import twod
+        twod.water_levels[...] = water
+        twod.draw_grid(screen, grid, viewport)
+    elif engine == "oned":
+        from oned import draw_1D_automaton
+        draw_1D_automaton(screen, grid, CELL_SIZE, color=BLACK, background=WHITE, viewport=viewport)
+    else:
+        from game_of_life import draw_grid
+        draw_grid(screen, grid, viewport)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gledalec pretakanja celičnega avtomata")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=STREAM_PORT)
+    parser.add_argument("--unix", help="pot do Unix vtičnice namesto TCP")
+    args = parser.parse_args()
+
+    reader = StreamReader(connect(args.host, args.port, args.unix))
+    reader.start()
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Celični avtomati - gledalec")
+    clock = pygame.time.Clock()
+    viewport = None
+    grid = water = None
+    running = True
+
+    disconnected = False
+
+    # Okno ostane odprto tudi po koncu prenosa, da je zadnjo sličico še mogoče pregledovati.
+    while running:
+        clock.tick(FPS)
+        for event in pygame.event.get():
+            if viewport is not None and viewport.handle_event(event):
+                continue
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                running = False
+
+        latest, regions = reader.take()
+        if latest is not None:
+            generation, frame = latest
+            decoder = reader.decoder
+            engine = decoder.hello["engine"]
+            if viewport is None:
+                mode = "majority" if engine == "twod" else "density"
+                viewport = Viewport(decoder.hello["rows"], decoder.hello["cols"], mode=mode)
+            # Pogled osveži le ploščice, ki so se spremenile glede na prejšnjo sličico.
+            previous, grid = grid, decoder.grid(frame)
+            viewport.track(grid, previous, regions)
+            water = decoder.water(frame) if engine == "twod" else None
+            pygame.display.set_caption(f"Celični avtomati - gledalec (generacija {generation})")
+        elif not reader.connected and not disconnected:
+            disconnected = True
+            pygame.display.set_caption(pygame.display.get_caption()[0] + " - povezava prekinjena")
+        # Riše se vsak okvir, da premik in povečava delujeta tudi, ko novih sličic ni.
+        if grid is not None:
+            draw_frame(screen, engine, grid, water, viewport)
+
+    pygame.quit()
+    sys.exit()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import os
 import pygame
 
 pygame.font.init()
@@ -8,10 +9,46 @@ HEIGHT = 600
 CELL_SIZE = 7
 FPS = 10
 
+# ------------------------ Viewport ------------------------
+VIEW_PAN_STEP     = 40     # premik pogleda v pikslih na pritisk puščice
+VIEW_ZOOM_STEP    = 1.25   # faktor povečave na korak (+/- ali kolesce)
+VIEW_MAX_CELL_PX  = 64     # največja velikost celice v pikslih
+MIPMAP_TILE       = 64     # velikost ploščice za sledenje spremembam v nivojih
+
+# ------------------------ Streaming ------------------------
+STREAM_PORT              = 8765
+STREAM_KEYFRAME_INTERVAL = 50   # vsaka n-ta sličica odjemalcu je celotna (ne delta)
+STREAM_SEND_BUFFER       = 16 * 1024   # velikost oddajnega medpomnilnika vtičnice na odjemalca
+STREAM_CLOSE_TIMEOUT     = 5.0   # sekunde, ki jih imajo odjemalci po koncu za zadnjo sličico
+
+# ------------------------ Statistics ------------------------
+STATS_CAPACITY         = 4096   # število generacij v krožnem medpomnilniku statistik
+STATS_SPARKLINE_POINTS = 200    # število zadnjih generacij na sparkline grafu
+
+# ------------------------ Random numbers ------------------------
+RNG_SEED = None   # seme za 2D simulacijo; None pomeni naključno seme ob zagonu
+
+# ------------------------ 1D memoized engine ------------------------
+MEMO_1D_MAX_CACHE = 1_000_000   # največ shranjenih rezultatov blokov v HashLife1D
+
+# ------------------------ Out-of-core Life ------------------------
+OOC_BAND_ROWS = 1024   # število vrstic, ki se hkrati obdelajo v pomnilniku
+
+# ------------------------ Export ------------------------
+EXPORT_WATER_SHADES = 32   # število odtenkov vode v paleti izvoženih animacij
+EXPORT_WORKERS      = 4    # število procesov za kodiranje sličic
+
+# ------------------------ Engine registry ------------------------
+ENGINE_CALIBRATION_PATH  = os.path.join(os.path.expanduser("~"), ".cache", "cellular_automaton",
+                                        "engines.json")   # shranjene meritve hitrosti izvedb
+ENGINE_RESELECT_INTERVAL = 50                  # vsakih toliko generacij se izvedba izbere znova
+ENGINE_PARALLEL_WORKERS  = os.cpu_count() or 1 # število niti za vzporedno izvedbo Game of Life
+
 # ------------------------ Colors ------------------------
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 RED   = (255, 0, 0)
+GREY  = (40, 40, 40)
 
 # ------------------------ Fonts ------------------------
 FONT_TITLE = pygame.font.SysFont("Arial", 48)
@@ -0,0 +1,381 @@
+"""
+Register izvedb (backendov) za posamezne vrste avtomatov.
+
+Vsaka izvedba je razred z enakim vmesnikom (initial_grid, step, draw), registriran z
+@register(vrsta, ime). Izvedbe iste vrste si delijo obliko mreže, zato jih je mogoče med
+simulacijo zamenjati. create() vrne AutoEngine, ki izvedbo izbere po velikosti mreže in deležu
+živih celic s pomočjo modela cene:
+
+    čas koraka = overhead + per_cell * celice + per_live * žive celice
+
+Koeficiente določi kratko merjenje hitrosti (calibrate), ki se shrani v ENGINE_CALIBRATION_PATH
+in se ponovi le, ko se spremeni nabor izvedb ali število procesorjev.
+
+Uporaba:
+    engine = create("life", rows, cols)                 # samodejna izbira
+    engine = create("life", rows, cols, backend="packed")
+    grid = engine.initial_grid()
+    grid = engine.step(grid)
+"""
+import json
+import os
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from constants import (
+    ROWS, COLS, CELL_SIZE, BLACK, WHITE, INITIAL_LIVE_RATIO, INITIAL_SAND_RATIO,
+    ENGINE_CALIBRATION_PATH, ENGINE_RESELECT_INTERVAL, ENGINE_PARALLEL_WORKERS
+)
+import game_of_life
+import oned
+import oned_memo
+
+REGISTRY = {}
+
+# Deleži živih celic, pri katerih se meri hitrost izvedb.
+CALIBRATION_DENSITIES = (0.05, 0.5)
+CALIBRATION_REPEATS = 3
+
+_pool = None
+
+
+def register(kind, name):
+    """Dekorator, ki razred izvedbe doda v REGISTRY pod vrsto 'kind' in imenom 'name'."""
+    def decorator(cls):
+        cls.kind = kind
+        cls.name = name
+        REGISTRY.setdefault(kind, {})[name] = cls
+        return cls
+    return decorator
+
+
+def backends(kind):
+    """Imena vseh registriranih izvedb za vrsto avtomata."""
+    return sorted(REGISTRY[kind])
+
+
+class Engine:
+    """Skupni vmesnik izvedb: podrazredi določijo vsaj step(grid)."""
+    kind = None
+    name = None
+    # Velikosti mrež za merjenje hitrosti; počasne izvedbe jih zmanjšajo.
+    calibration_shapes = ((64, 64), (512, 512))
+
+    def __init__(self, rows=ROWS, cols=COLS, rule=30, seed=None):
+        self.rows = rows
+        self.cols = cols
+        self.rule = rule
+        self.seed = seed
+
+    @classmethod
+    def available(cls):
+        """Ali je izvedba smiselna na tem računalniku (sicer se ne izbere samodejno)."""
+        return True
+
+    def initial_grid(self):
+        raise NotImplementedError
+
+    def step(self, grid):
+        raise NotImplementedError
+
+    def draw(self, screen, grid, viewport=None):
+        raise NotImplementedError
+
+    def workload(self, grid):
+        """Vrne (celice, žive celice), ki jih korak obdela; vhod za model cene."""
+        return grid.size, int(np.count_nonzero(grid))
+
+    def sample_grid(self, density, rng):
+        """Naključna mreža za merjenje hitrosti."""
+        return (rng.random((self.rows, self.cols)) < density).astype(int)
+
+    def calibration(self):
+        """Blok, znotraj katerega meritve ne vplivajo na statistiko simulacije."""
+        return nullcontext()
+
+
+# ------------------------ Game of Life ------------------------
+class LifeEngine(Engine):
+    def initial_grid(self):
+        return game_of_life.create_initial_grid(self.rows, self.cols)
+
+    def draw(self, screen, grid, viewport=None):
+        game_of_life.draw_grid(screen, grid, viewport)
+
+    def calibration(self):
+        return game_of_life.paused_stats()
+
+
+@register("life", "reference")
+class LifeReference(LifeEngine):
+    calibration_shapes = ((24, 24), (64, 64))
+
+    def step(self, grid):
+        return game_of_life.next_generation(grid)
+
+
+@register("life", "vectorized")
+class LifeVectorized(LifeEngine):
+    def step(self, grid):
+        return game_of_life.next_generation_vectorized(grid)
+
+
+@register("life", "packed")
+class LifePacked(LifeEngine):
+    def step(self, grid):
+        return game_of_life.next_generation_packed(grid)
+
+
+@register("life", "sparse")
+class LifeSparse(LifeEngine):
+    calibration_shapes = ((64, 64), (192, 192))
+
+    def step(self, grid):
+        return game_of_life.next_generation_sparse(grid)
+
+
+def _shared_pool():
+    """Skupna skupina niti za vzporedne izvedbe; ustvari se ob prvi uporabi in je ena za vse pogone."""
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=ENGINE_PARALLEL_WORKERS)
+    return _pool
+
+
+@register("life", "parallel")
+class LifeParallel(LifeEngine):
+    """Vektoriziran izračun, razdeljen na pasove vrstic, ki jih hkrati obdela več niti."""
+
+    def __init__(self, rows=ROWS, cols=COLS, rule=30, seed=None, workers=ENGINE_PARALLEL_WORKERS):
+        super().__init__(rows, cols, rule, seed)
+        self.workers = workers
+
+    @classmethod
+    def available(cls):
+        return ENGINE_PARALLEL_WORKERS > 1
+
+    def step(self, grid):
+        rows = grid.shape[0]
+        padded = np.pad(grid, ((1, 1), (0, 0)))
+        bounds = np.linspace(0, rows, min(self.workers, rows) + 1).astype(int)
+        # Pas [r0, r1) notranjih vrstic je v 'padded' na [r0 + 1, r1 + 1), s prekrivanjem pa [r0, r1 + 2).
+        parts = _shared_pool().map(lambda b: game_of_life.next_generation_band(padded[b[0]:b[1] + 2]),
+                              zip(bounds[:-1], bounds[1:]))
+        new_grid = np.concatenate(list(parts)).astype(grid.dtype)
+        game_of_life.record_changes(grid, new_grid)
+        return new_grid
+
+
+# ------------------------ 1D avtomat ------------------------
+class OnedEngine(Engine):
+    """1D avtomat kot drseča mreža: vsaka generacija doda novo vrstico na dno."""
+    # Izvedbe se razlikujejo le v izračunu nove vrstice, zato se meri z zelo nizkimi mrežami.
+    calibration_shapes = ((2, 256), (2, 8192))
+
+    def initial_grid(self):
+        grid = np.zeros((self.rows, self.cols), dtype=int)
+        grid[-1, self.cols // 2] = 1
+        return grid
+
+    def next_row(self, row):
+        raise NotImplementedError
+
+    def step(self, grid):
+        new_grid = np.empty_like(grid)
+        new_grid[:-1] = grid[1:]
+        new_grid[-1] = self.next_row(grid[-1])
+        return new_grid
+
+    def draw(self, screen, grid, viewport=None):
+        oned.draw_1D_automaton(screen, grid, CELL_SIZE, color=BLACK, background=WHITE,
+                               viewport=viewport)
+
+    def workload(self, grid):
+        return grid.shape[1], int(np.count_nonzero(grid[-1]))
+
+
+@register("oned", "reference")
+class OnedReference(OnedEngine):
+    def __init__(self, rows=ROWS, cols=COLS, rule=30, seed=None):
+        super().__init__(rows, cols, rule, seed)
+        self.table = oned.generate_rule(rule)
+
+    def next_row(self, row):
+        return oned.next_row(row, self.table)
+
+
+@register("oned", "packed")
+class OnedPacked(OnedEngine):
+    def __init__(self, rows=ROWS, cols=COLS, rule=30, seed=None):
+        super().__init__(rows, cols, rule, seed)
+        self.f = oned_memo.rule_function(rule)
+
+    def next_row(self, row):
+        words = oned_memo.step_packed(oned_memo.pack_row(row), len(row), self.f)
+        return oned_memo.unpack_row(words, len(row))
+
+
+# ------------------------ 2D peskovnik ------------------------
+@register("twod", "reference")
+class TwodReference(Engine):
+    """
+    Edina izvedba peskovnika: pravila za vodo, dim in balone so zaporedna (vsaka celica vidi
+    spremembe prejšnjih), zato jih ni mogoče enakovredno vektorizirati.
+    twod hrani stanje vode in dima v globalnih mrežah velikosti ROWS x COLS.
+    """
+
+    def __init__(self, rows=ROWS, cols=COLS, rule=30, seed=None):
+        if (rows, cols) != (ROWS, COLS):
+            raise ValueError(f"twod engine always uses a {ROWS}x{COLS} grid")
+        super().__init__(rows, cols, rule, seed)
+        self.static_walls = None
+
+    def initial_grid(self):
+        import twod
+        if self.seed is not None:
+            twod.set_seed(self.seed)
+        grid = twod.create_initial_grid(self.rows, self.cols, INITIAL_LIVE_RATIO, INITIAL_SAND_RATIO)
+        self.static_walls = (grid == 1)
+        return grid
+
+    def step(self, grid):
+        import twod
+        new_grid = twod.next_generation(grid)
+        if self.static_walls is not None:
+            twod.restore_walls(new_grid, self.static_walls)
+        twod.record_stats()
+        return new_grid
+
+    def draw(self, screen, grid, viewport=None):
+        import twod
+        twod.draw_grid(screen, grid, viewport)
+
+
+# ------------------------ Izbira izvedbe ------------------------
+def _measure(engine, density, rng):
+    grid = engine.sample_grid(density, rng)
+    best = float("inf")
+    for _ in range(CALIBRATION_REPEATS):
+        start = time.perf_counter()
+        engine.step(grid)
+        best = min(best, time.perf_counter() - start)
+    return engine.workload(grid), best
+
+
+def calibrate(kind, rule=30):
+    """
+    Izmeri vse izvedbe vrste 'kind' na nekaj majhnih mrežah in za vsako vrne koeficiente
+    modela cene [overhead, per_cell, per_live] (metoda najmanjših kvadratov, brez negativnih vrednosti).
+    """
+    rng = np.random.default_rng(0)
+    models = {}
+    for name, cls in REGISTRY[kind].items():
+        samples, times = [], []
+        for rows, cols in cls.calibration_shapes:
+            engine = cls(rows, cols, rule)
+            with engine.calibration():
+                for density in CALIBRATION_DENSITIES:
+                    (cells, live), seconds = _measure(engine, density, rng)
+                    samples.append((1.0, cells, live))
+                    times.append(seconds)
+        coef = np.linalg.lstsq(np.array(samples), np.array(times), rcond=None)[0]
+        models[name] = np.maximum(coef, 0.0).tolist()
+    return models
+
+
+def load_calibration(kind, path=ENGINE_CALIBRATION_PATH):
+    """
+    Vrne shranjene koeficiente za vrsto 'kind'; če jih ni ali ne ustrezajo trenutnim izvedbam
+    in številu procesorjev, izvedbe izmeri znova in rezultat shrani.
+    """
+    data = {}
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        pass
+    if data.get("cpu_count") != os.cpu_count():
+        data = {"cpu_count": os.cpu_count()}
+    models = data.get(kind)
+    if models is None or sorted(models) != backends(kind):
+        models = data[kind] = calibrate(kind)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+    return models
+
+
+def select(kind, cells, live, models=None):
+    """Ime izvedbe z najmanjšim predvidenim časom koraka za dano število celic in živih celic."""
+    candidates = [name for name, cls in REGISTRY[kind].items() if cls.available()]
+    if len(candidates) == 1:
+        return candidates[0]
+    if models is None:
+        models = load_calibration(kind)
+
+    def cost(name):
+        overhead, per_cell, per_live = models[name]
+        return overhead + per_cell * cells + per_live * live
+    return min(candidates, key=cost)
+
+
+class AutoEngine:
+    """
+    Izvedba, ki vsakih 'reselect_interval' generacij glede na trenutno mrežo izbere najhitrejšo
+    registrirano izvedbo. Če je podan 'backend', se vedno uporabi ta izvedba.
+    """
+
+    def __init__(self, kind, rows=ROWS, cols=COLS, rule=30, seed=None, backend=None,
+                 reselect_interval=ENGINE_RESELECT_INTERVAL):
+        if backend is not None and backend not in REGISTRY[kind]:
+            raise ValueError(f"unknown {kind} backend {backend!r}; choose from {backends(kind)}")
+        self.kind = kind
+        self.args = (rows, cols, rule, seed)
+        self.forced = backend
+        self.reselect_interval = reselect_interval
+        self._instances = {}
+        self.steps = 0
+        # Prava izbira sledi ob prvem koraku, ko je znan delež živih celic.
+        self.backend = self._instance(backend or next(iter(REGISTRY[kind])))
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    def _instance(self, name):
+        engine = self._instances.get(name)
+        if engine is None:
+            engine = self._instances[name] = REGISTRY[self.kind][name](*self.args)
+        return engine
+
+    def reselect(self, grid):
+        if self.forced is None:
+            cells, live = self.backend.workload(grid)
+            self.backend = self._instance(select(self.kind, cells, live))
+        return self.backend.name
+
+    def initial_grid(self):
+        grid = self.backend.initial_grid()
+        self.reselect(grid)
+        self.steps = 0
+        return grid
+
+    def step(self, grid):
+        if self.steps % self.reselect_interval == 0:
+            self.reselect(grid)
+        self.steps += 1
+        return self.backend.step(grid)
+
+    def draw(self, screen, grid, viewport=None):
+        self.backend.draw(screen, grid, viewport)
+
+
+def create(kind, rows=ROWS, cols=COLS, rule=30, seed=None, backend=None):
+    """Ustvari pogon za vrsto 'kind' ("life", "oned", "twod") s samodejno ali vsiljeno izvedbo."""
+    return AutoEngine(kind, rows, cols, rule, seed, backend)
@@ -0,0 +1,350 @@
+"""
+Izvoz animacij brez okna: pogon se izvaja brez pygame zanke (ali pa se bere posnetek strežnika),
+sličice se pretvorijo v indeksirane slike s paleto in kodirajo v več procesih hkrati.
+
+Uporaba:
+    python export.py --engine twod --generations 300 --out sandbox.gif --scale 3
+    python export.py --recording run.rec --format apng --out run.png --skip 5
+    python export.py --engine life --rows 400 --cols 400 --format raw --out frames/
+"""
+import argparse
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from constants import (
+    ROWS, COLS, FPS, BLACK, WHITE, BASE_COLOR_MAP, MAX_WATER_CAPACITY,
+    EXPORT_WATER_SHADES, EXPORT_WORKERS
+)
+
+# Indeksi v paleti: materiali imajo svoje številke, odtenki vode pa se začnejo pri WATER_BASE.
+WATER_BASE = 16
+
+
+def water_color(t):
+    """Barva vode za delež t = količina / MAX_WATER_CAPACITY (enak preliv kot v twod.draw_grid)."""
+    return (int(173 * (1 - t)), int(216 * (1 - t)), int(230 * (1 - t) + 139 * t))
+
+
+def build_palette(engine):
+    """Vrne paleto (256 x 3, uint8) za izbrani pogon."""
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    if engine == "twod":
+        for state, color in BASE_COLOR_MAP.items():
+            palette[state] = color
+        for i in range(EXPORT_WATER_SHADES):
+            palette[WATER_BASE + i] = water_color(i / (EXPORT_WATER_SHADES - 1))
+    elif engine == "oned":
+        palette[0], palette[1] = WHITE, BLACK
+    else:
+        palette[0], palette[1] = BLACK, WHITE
+    return palette
+
+
+def rasterize(engine, grid, water=None):
+    """
+    Pretvori stanje mreže v indeksirano sliko (uint8, ena celica = en piksel).
+    Pri twod se voda pobarva z enim od EXPORT_WATER_SHADES odtenkov glede na količino vode.
+    """
+    image = grid.astype(np.uint8)
+    if engine == "twod" and water is not None:
+        is_water = grid == 7
+        t = np.minimum(water[is_water], MAX_WATER_CAPACITY) / MAX_WATER_CAPACITY
+        image[is_water] = WATER_BASE + np.round(t * (EXPORT_WATER_SHADES - 1)).astype(np.uint8)
+    return image
+
+
+def transform(image, crop=None, scale=1):
+    """Izreže (r0, r1, c0, c1) in poveča sliko za celoštevilski faktor (najbližji sosed)."""
+    if crop is not None:
+        r0, r1, c0, c1 = crop
+        image = image[r0:r1, c0:c1]
+    if scale > 1:
+        image = np.repeat(np.repeat(image, scale, axis=0), scale, axis=1)
+    return np.ascontiguousarray(image)
+
+
+# ------------------------ GIF ------------------------
+def lzw_encode(data, min_code_size=8):
+    """Kodiranje LZW za GIF (spremenljiva dolžina kode do 12 bitov)."""
+    clear = 1 << min_code_size
+    end = clear + 1
+    out = bytearray()
+    bits = 0
+    nbits = 0
+    code_size = min_code_size + 1
+    next_code = end + 1
+    table = {}
+
+    def emit(code):
+        nonlocal bits, nbits
+        bits |= code << nbits
+        nbits += code_size
+        while nbits >= 8:
+            out.append(bits & 0xFF)
+            bits >>= 8
+            nbits -= 8
+
+    emit(clear)
+    prefix = data[0]
+    for byte in data[1:]:
+        key = (prefix << 8) | byte
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        emit(prefix)
+        if next_code < 4096:
+            table[key] = next_code
+            next_code += 1
+            if next_code > (1 << code_size) and code_size < 12:
+                code_size += 1
+        else:
+            emit(clear)
+            table.clear()
+            code_size = min_code_size + 1
+            next_code = end + 1
+        prefix = byte
+    emit(prefix)
+    emit(end)
+    if nbits:
+        out.append(bits & 0xFF)
+    return bytes(out)
+
+
+def encode_gif_frame(image, delay_cs):
+    """Kodira eno sličico GIF (razširitev za zamik, opis slike in podatki LZW)."""
+    height, width = image.shape
+    data = lzw_encode(image.tobytes())
+    out = bytearray(b"\x21\xF9\x04\x00" + struct.pack("<H", delay_cs) + b"\x00\x00")
+    out += b"\x2C" + struct.pack("<HHHH", 0, 0, width, height) + b"\x00"
+    out.append(8)
+    for i in range(0, len(data), 255):
+        block = data[i:i + 255]
+        out.append(len(block))
+        out += block
+    out.append(0)
+    return bytes(out)
+
+
+class GifWriter:
+    def __init__(self, path, palette, fps):
+        self.file = open(path, "wb")
+        self.palette = palette
+        self.delay = max(1, round(100 / fps))
+        self.started = False
+
+    def encode_args(self, image):
+        return encode_gif_frame, (image, self.delay)
+
+    def write(self, image_shape, encoded):
+        if not self.started:
+            height, width = image_shape
+            self.file.write(b"GIF89a" + struct.pack("<HH", width, height) + b"\xF7\x00\x00")
+            self.file.write(self.palette.tobytes())
+            # Razširitev NETSCAPE2.0: animacija se ponavlja v neskončnost.
+            self.file.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00")
+            self.started = True
+        self.file.write(encoded)
+
+    def close(self):
+        self.file.write(b"\x3B")
+        self.file.close()
+
+
+# ------------------------ APNG ------------------------
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png_data(image):
+    """Stisne indeksirano sliko v podatke PNG (vsaka vrstica s filtrom 0)."""
+    height, width = image.shape
+    raw = np.zeros((height, width + 1), dtype=np.uint8)
+    raw[:, 1:] = image
+    return zlib.compress(raw.tobytes(), 6)
+
+
+class ApngWriter:
+    def __init__(self, path, palette, fps):
+        self.file = open(path, "wb")
+        self.palette = palette
+        self.fps = fps
+        self.frames = 0
+        self.sequence = 0
+        self.actl_offset = None
+
+    def encode_args(self, image):
+        return encode_png_data, (image,)
+
+    def write(self, image_shape, encoded):
+        height, width = image_shape
+        if self.frames == 0:
+            self.file.write(b"\x89PNG\r\n\x1a\n")
+            self.file.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)))
+            self.actl_offset = self.file.tell()
+            # Število sličic ni znano vnaprej; acTL se popravi ob zaprtju.
+            self.file.write(_png_chunk(b"acTL", struct.pack(">II", 0, 0)))
+            self.file.write(_png_chunk(b"PLTE", self.palette.tobytes()))
+        fctl = struct.pack(">IIIIIHHBB", self.sequence, width, height, 0, 0,
+                           1, max(1, int(round(self.fps))), 0, 0)
+        self.file.write(_png_chunk(b"fcTL", fctl))
+        self.sequence += 1
+        if self.frames == 0:
+            self.file.write(_png_chunk(b"IDAT", encoded))
+        else:
+            self.file.write(_png_chunk(b"fdAT", struct.pack(">I", self.sequence) + encoded))
+            self.sequence += 1
+        self.frames += 1
+
+    def close(self):
+        self.file.write(_png_chunk(b"IEND", b""))
+        if self.actl_offset is not None:
+            self.file.seek(self.actl_offset)
+            self.file.write(_png_chunk(b"acTL", struct.pack(">II", self.frames, 0)))
+        self.file.close()
+
+
+# ------------------------ Raw ------------------------
+def _identity(image):
+    return image
+
+
+class RawWriter:
+    """Zapiše vsako sličico kot indeksirano tabelo frame_NNNNNN.npy in paleto v palette.npy."""
+
+    def __init__(self, path, palette, fps):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.frames = 0
+        np.save(os.path.join(path, "palette.npy"), palette)
+
+    def encode_args(self, image):
+        return _identity, (image,)
+
+    def write(self, image_shape, encoded):
+        np.save(os.path.join(self.path, f"frame_{self.frames:06d}.npy"), encoded)
+        self.frames += 1
+
+    def close(self):
+        pass
+
+
+WRITERS = {"gif": GifWriter, "apng": ApngWriter, "raw": RawWriter}
+
+
+# ------------------------ Viri sličic ------------------------
+def engine_frames(engine, rows, cols, rule, generations, seed=None, backend=None):
+    """Izvaja pogon brez okna in vrne (grid, water) za generacije 0..generations."""
+    import engines
+    runner = engines.create(engine, rows, cols, rule, seed, backend)
+    grid = runner.initial_grid()
+    for generation in range(generations + 1):
+        if generation:
+            grid = runner.step(grid)
+        water = None
+        if engine == "twod":
+            import twod
+            water = twod.water_levels
+        yield generation, grid, water
+
+
+def recording_frames(path):
+    """Bere posnetek strežnika in vrne (grid, water) za vsako sličico."""
+    from server import read_recording
+    for decoder, generation, frame in read_recording(path):
+        water = decoder.water(frame) if decoder.hello["engine"] == "twod" else None
+        yield generation, decoder.grid(frame), water
+
+
+def export(frames, engine, out, fmt="gif", skip=1, crop=None, scale=1, fps=FPS,
+           workers=EXPORT_WORKERS):
+    """
+    Pretvori sličice v animacijo. Rasterizacija poteka v glavnem procesu, kodiranje pa v skupini
+    procesov; hkrati je v obdelavi največ 2 * workers sličic, zato poraba pomnilnika ostane omejena
+    ne glede na dolžino posnetka. Zapisane so le generacije, deljive s 'skip'.
+    """
+    writer = WRITERS[fmt](out, build_palette(engine), fps)
+    pending = deque()
+    count = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for generation, grid, water in frames:
+            if generation % skip:
+                continue
+            image = transform(rasterize(engine, grid, water), crop, scale)
+            func, args = writer.encode_args(image)
+            pending.append((image.shape, pool.submit(func, *args)))
+            if len(pending) >= 2 * workers:
+                shape, future = pending.popleft()
+                writer.write(shape, future.result())
+            count += 1
+        while pending:
+            shape, future = pending.popleft()
+            writer.write(shape, future.result())
+    writer.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Izvoz animacije celičnega avtomata")
+    parser.add_argument("--engine", choices=("life", "oned", "twod"), default="twod")
+    parser.add_argument("--recording", help="posnetek strežnika (server.py --record) namesto pogona")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--rule", type=int, default=30, help="pravilo za pogon oned")
+    parser.add_argument("--seed", type=int, help="seme za ponovljiv zagon pogona twod")
+    parser.add_argument("--backend", help="vsili izvedbo pogona (privzeto samodejna izbira)")
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--format", choices=sorted(WRITERS), default="gif")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--skip", type=int, default=1, help="zapiši le vsako n-to generacijo")
+    parser.add_argument("--crop", type=int, nargs=4, metavar=("R0", "R1", "C0", "C1"))
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--fps", type=float, default=FPS)
+    parser.add_argument("--workers", type=int, default=EXPORT_WORKERS)
+    args = parser.parse_args()
+    if args.skip < 1:
+        parser.error("--skip must be at least 1")
+    if args.scale < 1:
+        parser.error("--scale must be at least 1")
+    if args.fps <= 0:
+        parser.error("--fps must be positive")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if args.recording:
+        from server import read_recording
+        first = next(read_recording(args.recording), None)
+        if first is None:
+            parser.error("recording is empty")
+        engine = first[0].hello["engine"]
+        shape = (first[0].hello["rows"], first[0].hello["cols"])
+        frames = recording_frames(args.recording)
+    else:
+        engine = args.engine
+        import engines
+        # twod vedno teče na mreži ROWS x COLS (globalne mreže vode in dima).
+        shape = (ROWS, COLS) if engine == "twod" else (args.rows, args.cols)
+        if engine == "twod" and (args.rows, args.cols) != shape:
+            parser.error(f"twod engine always uses a {ROWS}x{COLS} grid")
+        if args.backend and args.backend not in engines.REGISTRY[engine]:
+            parser.error(f"unknown {engine} backend {args.backend!r}; "
+                         f"choose from {engines.backends(engine)}")
+        frames = engine_frames(engine, args.rows, args.cols, args.rule, args.generations,
+                               args.seed, args.backend)
+
+    if args.crop is not None:
+        r0, r1, c0, c1 = args.crop
+        rows, cols = shape
+        if not (0 <= r0 < r1 <= rows and 0 <= c0 < c1 <= cols):
+            parser.error(f"--crop must select a non-empty region inside the {rows}x{cols} grid")
+
+    count = export(frames, engine, args.out, args.format, args.skip, args.crop, args.scale,
+                   args.fps, args.workers)
+    print(f"Exported {count} frames to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
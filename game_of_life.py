@@ -1,22 +1,37 @@
 import pygame
 import numpy as np
+from collections import Counter
+from contextlib import contextmanager
 from constants import (
     WIDTH, HEIGHT, FPS, CELL_SIZE, BLACK , WHITE, GREY
 )
+from viewport import Viewport, density_colorizer, mask_regions, cell_regions
+from stats import StatsHistory
 
 ROWS = HEIGHT // CELL_SIZE
 COLS = WIDTH // CELL_SIZE
 
 LIVE_RATIO = 0.2 
 
+# Populacija se vzdržuje sproti (rojstva in smrti v next_generation), brez ponovnega štetja mreže.
+counters = {"population": 0, "births": 0, "deaths": 0}
+history = StatsHistory(("population", "births", "deaths"))
+_recording = True
+# Pravokotniki ploščic, spremenjenih v zadnji generaciji (za Viewport.track); None pomeni neznano.
+dirty_regions = None
+
 def create_initial_grid(rows, cols, live_ratio=LIVE_RATIO):
-    grid = np.zeros((rows, cols), dtype=int)
-    for r in range(rows):
-        for c in range(cols):
-            if np.random.random() < live_ratio:
-                grid[r, c] = 1
+    # Ista zaporedja števil kot klic np.random.random() za vsako celico, a brez zanke v Pythonu.
+    grid = (np.random.random((rows, cols)) < live_ratio).astype(int)
+    counters["population"] = int(grid.sum())
+    history.clear()
     return grid
 
+def toggle_cell(grid, r, c):
+    """Obrne stanje celice (živa <-> mrtva) in popravi števec populacije."""
+    grid[r, c] = 0 if grid[r, c] == 1 else 1
+    counters["population"] += 1 if grid[r, c] == 1 else -1
+
 def count_live_neighbors(grid, r, c):
     rows, cols = grid.shape
     count = 0
@@ -38,10 +53,15 @@ def next_generation(grid):
     1) Če je celica živa in ima <2 ali >3 žive sosede, umre (osamljenost ali prenaseljenost).
     2) Če je celica mrtva in ima natanko 3 žive sosede, oživi (reprodukcija).
 
+    Med izračunom se štejejo rojstva in smrti; populacija in oba števca se shranita v 'history'.
+
     Vrne: new_grid (2D numpy array) z novim stanjem.
     """
     rows, cols = grid.shape
     new_grid = np.copy(grid)
+    births = 0
+    deaths = 0
+    changed = []
 
     # Gremo skozi vse celice in določimo, kaj se zgodi v naslednjem koraku.
     for r in range(rows):
@@ -52,14 +72,148 @@ def next_generation(grid):
                 # ... in ima <2 ali >3 sosedov, umre -> 0.
                 if live_neighbors < 2 or live_neighbors > 3:
                     new_grid[r, c] = 0
+                    deaths += 1
+                    changed.append((r, c))
             else:
                 # Če je trenutna celica mrtva, oživi (1), če ima natanko 3 sosedov.
                 if live_neighbors == 3:
                     new_grid[r, c] = 1
+                    births += 1
+                    changed.append((r, c))
+    record_step(births, deaths, cell_regions(changed))
     return new_grid
 
-def draw_grid(screen, grid):
+def record_step(births, deaths, regions=None):
+    """
+    Posodobi števce po eni generaciji in jih shrani v 'history' (skupno za vse izvedbe koraka).
+    'regions' so spremenjene ploščice, ki jih pogled osveži brez ponovne primerjave mrež.
+    """
+    global dirty_regions
+    if not _recording:
+        return
+    dirty_regions = regions
+    counters["population"] += births - deaths
+    counters["births"] = births
+    counters["deaths"] = deaths
+    history.record(**counters)
+
+def record_changes(grid, new_grid):
+    """Z eno primerjavo mrež prešteje rojstva in smrti ter določi spremenjene ploščice."""
+    changed = new_grid != grid
+    total = int(np.count_nonzero(changed))
+    births = int(np.count_nonzero(new_grid[changed]))
+    record_step(births, total - births, mask_regions(changed))
+
+@contextmanager
+def paused_stats():
+    """Znotraj bloka koraki ne spreminjajo števcev in zgodovine (npr. pri merjenju hitrosti izvedb)."""
+    global _recording
+    previous, _recording = _recording, False
+    try:
+        yield
+    finally:
+        _recording = previous
+
+def next_generation_vectorized(grid):
+    """Enako kot next_generation, a izračunano z numpy nad celotno mrežo naenkrat."""
+    new_grid = next_generation_band(np.pad(grid, ((1, 1), (0, 0)))).astype(grid.dtype)
+    record_changes(grid, new_grid)
+    return new_grid
+
+def next_generation_packed(grid):
+    """
+    Enako kot next_generation, a z bitno vzporednim izračunom: vrstice so zapakirane v besede
+    uint64 (64 celic na besedo), število sosedov pa se sešteva z bitnimi seštevalniki (mod 8).
+    """
+    rows, cols = grid.shape
+    width = -(-cols // 64) * 64
+    bits = np.zeros((rows, width), dtype=np.uint8)
+    bits[:, :cols] = grid != 0
+    alive = np.packbits(bits, axis=1, bitorder="little").view(np.uint64)
+
+    one = np.uint64(1)
+    top = np.uint64(63)
+    west = alive << one
+    west[:, 1:] |= alive[:, :-1] >> top
+    east = alive >> one
+    east[:, :-1] |= alive[:, 1:] << top
+    planes = []
+    for row_plane in (west, alive, east):
+        up = np.zeros_like(row_plane)
+        up[1:] = row_plane[:-1]
+        down = np.zeros_like(row_plane)
+        down[:-1] = row_plane[1:]
+        planes += [up, down]
+    planes += [west, east]
+
+    s0 = np.zeros_like(alive)
+    s1 = np.zeros_like(alive)
+    s2 = np.zeros_like(alive)
+    for plane in planes:
+        c0 = s0 & plane
+        s0 ^= plane
+        c1 = s1 & c0
+        s1 ^= c0
+        s2 ^= c1
+    new = ~s2 & s1 & (s0 | alive)
+    new_bits = np.unpackbits(new.view(np.uint8), axis=1, bitorder="little")[:, :cols]
+    new_grid = new_bits.astype(grid.dtype)
+    record_changes(grid, new_grid)
+    return new_grid
+
+def next_generation_sparse(grid):
+    """
+    Enako kot next_generation, a obdela le žive celice in njihove sosede;
+    primerno za redke mreže, kjer je delo sorazmerno številu živih celic.
+    """
+    rows, cols = grid.shape
+    live = set(zip(*(idx.tolist() for idx in np.nonzero(grid))))
+    neighbors = Counter()
+    for (r, c) in live:
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if dr or dc:
+                    neighbors[(r + dr, c + dc)] += 1
+    new_grid = np.zeros_like(grid)
+    born = []
+    survivors = set()
+    for (r, c), n in neighbors.items():
+        if 0 <= r < rows and 0 <= c < cols:
+            if n == 3 and (r, c) not in live:
+                new_grid[r, c] = 1
+                born.append((r, c))
+            elif (n == 2 or n == 3) and (r, c) in live:
+                new_grid[r, c] = 1
+                survivors.add((r, c))
+    died = live - survivors
+    record_step(len(born), len(died), cell_regions(born + list(died)))
+    return new_grid
+
+def next_generation_band(band):
+    """
+    Vektoriziran izračun naslednje generacije za pas vrstic.
+    'band' vsebuje poleg notranjih vrstic še po eno sosednjo vrstico zgoraj in spodaj (prekrivanje);
+    vrne novo stanje samo za notranje vrstice. Celice izven mreže levo in desno so mrtve,
+    pravila pa so enaka kot v next_generation.
+    """
+    padded = np.pad(band.astype(np.uint8), ((0, 0), (1, 1)))
+    rows = padded.shape[0] - 2
+    cols = padded.shape[1] - 2
+    counts = np.zeros((rows, cols), dtype=np.uint8)
+    for dr in (0, 1, 2):
+        for dc in (0, 1, 2):
+            if dr == 1 and dc == 1:
+                continue
+            counts += padded[dr:dr + rows, dc:dc + cols]
+    alive = padded[1:-1, 1:-1] == 1
+    return ((counts == 3) | (alive & (counts == 2))).astype(np.uint8)
+
+def draw_grid(screen, grid, viewport=None):
     screen.fill(BLACK)
+    if viewport is not None:
+        viewport.draw(screen, grid, density_colorizer(WHITE, BLACK))
+        pygame.display.flip()
+        return
     rows, cols = grid.shape
     for r in range(rows):
         for c in range(cols):
@@ -82,6 +236,7 @@ def main():
     clock = pygame.time.Clock()
 
     grid = create_initial_grid(ROWS, COLS)
+    viewport = Viewport(ROWS, COLS)
 
     running = True  
     paused = False  
@@ -90,16 +245,19 @@ def main():
         clock.tick(FPS)  
 
         for event in pygame.event.get():
+            if viewport.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 running = False
 
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:
                     mx, my = event.pos
-                    r, c = mouse_to_grid_pos(mx, my)
+                    r, c = viewport.screen_to_grid(mx, my)
                     if 0 <= r < ROWS and 0 <= c < COLS:
                         # Če je bila živa (1), postane mrtva (0) in obratno.
-                        grid[r, c] = 0 if grid[r, c] == 1 else 1
+                        toggle_cell(grid, r, c)
+                        viewport.mark_dirty(r, r + 1, c, c + 1)
 
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
@@ -108,6 +266,8 @@ def main():
                     grid = create_initial_grid(ROWS, COLS)
 
         if not paused:
-            grid = next_generation(grid)
+            new_grid = next_generation(grid)
+            viewport.track(new_grid, grid)
+            grid = new_grid
 
-        draw_grid(screen, grid)
\ No newline at end of file
+        draw_grid(screen, grid, viewport)
\ No newline at end of file
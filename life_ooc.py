@@ -0,0 +1,173 @@
+import argparse
+import json
+import mmap
+import os
+import sys
+import numpy as np
+from constants import OOC_BAND_ROWS
+from game_of_life import next_generation_band, LIVE_RATIO
+
+
+def _advise_sequential(memmap):
+    """Jedru namigne, da se bo datoteka brala zaporedno (večji read-ahead), če je to podprto."""
+    raw = getattr(memmap, "_mmap", None)
+    if raw is not None and hasattr(raw, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+        raw.madvise(mmap.MADV_SEQUENTIAL)
+
+
+class OutOfCoreLife:
+    """
+    Game of Life za mreže, večje od pomnilnika.
+
+    Mreža je bitno zapakirana (8 celic na bajt) v dveh datotekah numpy.memmap (PATH.0 in PATH.1),
+    ki se izmenjujeta kot vir in cilj (dvojni medpomnilnik). Generacija se računa v pasovih po
+    band_rows vrstic z eno vrstico prekrivanja zgoraj in spodaj; branje in pisanje potekata
+    zaporedno od vrha do dna. Stanje (velikost, generacija, trenutna datoteka) je v PATH.json
+    in se zapiše po vsaki končani generaciji, zato se prekinjen izračun nadaljuje pri zadnji
+    celotni generaciji.
+    """
+
+    def __init__(self, path, band_rows=OOC_BAND_ROWS):
+        self.path = path
+        self.band_rows = band_rows
+        with open(self._state_path()) as f:
+            state = json.load(f)
+        self.rows = state["rows"]
+        self.cols = state["cols"]
+        self.generation = state["generation"]
+        self.current = state["current"]
+
+    @property
+    def row_bytes(self):
+        return (self.cols + 7) // 8
+
+    def _state_path(self):
+        return self.path + ".json"
+
+    def _data_path(self, index):
+        return f"{self.path}.{index}"
+
+    def _save_state(self):
+        state = {"rows": self.rows, "cols": self.cols,
+                 "generation": self.generation, "current": self.current}
+        tmp = self._state_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self._state_path())
+
+    def _open(self, index, mode):
+        data = np.memmap(self._data_path(index), dtype=np.uint8, mode=mode,
+                         shape=(self.rows, self.row_bytes))
+        _advise_sequential(data)
+        return data
+
+    @classmethod
+    def create(cls, path, rows, cols, live_ratio=LIVE_RATIO, seed=None, band_rows=OOC_BAND_ROWS):
+        """Ustvari novo naključno mrežo na disku (pas za pasom) in vrne odprt objekt."""
+        rng = np.random.default_rng(seed)
+        row_bytes = (cols + 7) // 8
+        for index in (0, 1):
+            data = np.memmap(f"{path}.{index}", dtype=np.uint8, mode="w+", shape=(rows, row_bytes))
+            if index == 0:
+                for r0 in range(0, rows, band_rows):
+                    r1 = min(rows, r0 + band_rows)
+                    band = rng.random((r1 - r0, cols)) < live_ratio
+                    data[r0:r1] = np.packbits(band, axis=1, bitorder="little")
+            data.flush()
+            del data
+        with open(path + ".json", "w") as f:
+            json.dump({"rows": rows, "cols": cols, "generation": 0, "current": 0}, f)
+        return cls(path, band_rows)
+
+    @classmethod
+    def from_grid(cls, path, grid, band_rows=OOC_BAND_ROWS):
+        """Shrani obstoječo mrežo (numpy 0/1) v obliko za izračun izven pomnilnika."""
+        rows, cols = grid.shape
+        ooc = cls.create(path, rows, cols, live_ratio=0.0, band_rows=band_rows)
+        data = ooc._open(ooc.current, "r+")
+        for r0 in range(0, rows, band_rows):
+            r1 = min(rows, r0 + band_rows)
+            data[r0:r1] = np.packbits(grid[r0:r1] != 0, axis=1, bitorder="little")
+        data.flush()
+        return ooc
+
+    def _unpack(self, packed):
+        return np.unpackbits(packed, axis=1, count=self.cols, bitorder="little")
+
+    def read_rows(self, r0, r1):
+        """Vrne vrstice [r0, r1) trenutne generacije kot tabelo 0/1 (npr. za prikaz)."""
+        data = self._open(self.current, "r")
+        return self._unpack(np.array(data[r0:r1])).astype(int)
+
+    def population(self):
+        """Prešteje žive celice trenutne generacije (zaporedno po pasovih)."""
+        data = self._open(self.current, "r")
+        total = 0
+        for r0 in range(0, self.rows, self.band_rows):
+            total += int(np.unpackbits(np.array(data[r0:r0 + self.band_rows])).sum())
+        return total
+
+    def step(self, progress=None):
+        """
+        Izračuna eno generacijo iz trenutne datoteke v drugo.
+        progress(generation, rows_done, rows) se pokliče po vsakem pasu.
+        """
+        src = self._open(self.current, "r")
+        dst = self._open(1 - self.current, "r+")
+        zero = np.zeros((1, self.cols), dtype=np.uint8)
+        for r0 in range(0, self.rows, self.band_rows):
+            r1 = min(self.rows, r0 + self.band_rows)
+            # Pas z eno vrstico prekrivanja zgoraj in spodaj; izven mreže so mrtve celice.
+            lo, hi = max(0, r0 - 1), min(self.rows, r1 + 1)
+            band = self._unpack(np.array(src[lo:hi]))
+            if r0 == 0:
+                band = np.concatenate([zero, band])
+            if r1 == self.rows:
+                band = np.concatenate([band, zero])
+            dst[r0:r1] = np.packbits(next_generation_band(band), axis=1, bitorder="little")
+            if progress is not None:
+                progress(self.generation, r1, self.rows)
+        dst.flush()
+        del src, dst
+        self.current = 1 - self.current
+        self.generation += 1
+        self._save_state()
+
+    def run(self, generations, progress=None):
+        for _ in range(generations):
+            self.step(progress)
+
+
+def print_progress(generation, rows_done, rows):
+    sys.stdout.write(f"\rGeneration {generation}: {100 * rows_done / rows:5.1f}%")
+    if rows_done == rows:
+        sys.stdout.write("\n")
+    sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game of Life izven pomnilnika (memmap)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    create = sub.add_parser("create", help="ustvari novo naključno mrežo")
+    create.add_argument("path")
+    create.add_argument("--rows", type=int, required=True)
+    create.add_argument("--cols", type=int, required=True)
+    create.add_argument("--live-ratio", type=float, default=LIVE_RATIO)
+    create.add_argument("--seed", type=int)
+    run = sub.add_parser("run", help="nadaljuj izračun obstoječe mreže")
+    run.add_argument("path")
+    run.add_argument("--generations", type=int, default=1)
+    for p in (create, run):
+        p.add_argument("--band-rows", type=int, default=OOC_BAND_ROWS)
+    args = parser.parse_args()
+
+    if args.command == "create":
+        OutOfCoreLife.create(args.path, args.rows, args.cols, args.live_ratio, args.seed, args.band_rows)
+    else:
+        life = OutOfCoreLife(args.path, args.band_rows)
+        life.run(args.generations, print_progress)
+        print(f"Generation {life.generation}, population {life.population()}")
+
+
+if __name__ == "__main__":
+    main()
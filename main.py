@@ -1,3 +1,4 @@
+import argparse
 import sys
 import pygame
 import numpy as np
@@ -6,8 +7,12 @@ from constants import (
     BLACK, WHITE, RED,
     FONT_TITLE, FONT_MENU, FONT_INPUT, CELL_SIZE
 )
-from oned import run_automaton_1D, draw_1D_automaton
+from oned import draw_1D_automaton
 from twod import run_simulation_2D
+import game_of_life
+from game_of_life import toggle_cell
+from viewport import Viewport
+import engines
 
 class GameState:
     MENU = 0
@@ -22,59 +27,20 @@ def draw_text_centered(surface, text, font, color, center_x, center_y):
     rect.center = (center_x, center_y)
     surface.blit(rendered, rect)
 
-def run_game_of_life():
-    rows = HEIGHT // CELL_SIZE
-    cols = WIDTH // CELL_SIZE
-    LIVE_RATIO = 0.2
-
-    grid = np.zeros((rows, cols), dtype=int)
-    for r in range(rows):
-        for c in range(cols):
-            if np.random.random() < LIVE_RATIO:
-                grid[r, c] = 1
+def run_game_of_life(backend=None, rows=HEIGHT // CELL_SIZE, cols=WIDTH // CELL_SIZE):
+    engine = engines.create("life", rows, cols, backend=backend)
+    grid = engine.initial_grid()
 
     clock = pygame.time.Clock()
     paused = False
     running = True
-
-    def count_live_neighbors(grid, r, c):
-        count = 0
-        for i in range(r - 1, r + 2):
-            for j in range(c - 1, c + 2):
-                if (i == r and j == c) or i < 0 or j < 0 or i >= rows or j >= cols:
-                    continue
-                count += grid[i, j]
-        return count
-
-    def next_generation(grid):
-        new_grid = grid.copy()
-        for r in range(rows):
-            for c in range(cols):
-                live_neighbors = count_live_neighbors(grid, r, c)
-                if grid[r, c] == 1:
-                    if live_neighbors < 2 or live_neighbors > 3:
-                        new_grid[r, c] = 0
-                else:
-                    if live_neighbors == 3:
-                        new_grid[r, c] = 1
-        return new_grid
-
-    def draw_game(screen, grid):
-        screen.fill(BLACK)
-        for r in range(rows):
-            for c in range(cols):
-                if grid[r, c] == 1:
-                    x = c * CELL_SIZE
-                    y = r * CELL_SIZE
-                    pygame.draw.rect(screen, WHITE, (x, y, CELL_SIZE, CELL_SIZE))
-        pygame.display.flip()
-
-    def mouse_to_grid_pos(mx, my):
-        return my // CELL_SIZE, mx // CELL_SIZE
+    viewport = Viewport(rows, cols)
 
     while running:
         clock.tick(FPS)
         for event in pygame.event.get():
+            if viewport.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 running = False
                 pygame.quit()
@@ -83,24 +49,37 @@ def run_game_of_life():
                 if event.key == pygame.K_SPACE:
                     paused = not paused
                 elif event.key == pygame.K_r:
-                    grid = np.zeros((rows, cols), dtype=int)
-                    for r in range(rows):
-                        for c in range(cols):
-                            if np.random.random() < LIVE_RATIO:
-                                grid[r, c] = 1
+                    grid = engine.initial_grid()
+                    viewport.track(grid)
                 elif event.key == pygame.K_ESCAPE:
                     running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1: 
-                    r, c = mouse_to_grid_pos(*event.pos)
+                    r, c = viewport.screen_to_grid(*event.pos)
                     if 0 <= r < rows and 0 <= c < cols:
-                        grid[r, c] = 0 if grid[r, c] == 1 else 1
+                        toggle_cell(grid, r, c)
+                        viewport.mark_dirty(r, r + 1, c, c + 1)
 
         if not paused:
-            grid = next_generation(grid)
-        draw_game(pygame.display.get_surface(), grid)
+            new_grid = engine.step(grid)
+            # Korak sam sporoči spremenjene ploščice, zato pogledu ni treba primerjati celih mrež.
+            viewport.track(new_grid, grid, regions=game_of_life.dirty_regions)
+            grid = new_grid
+        engine.draw(pygame.display.get_surface(), grid, viewport)
+
+def compute_1D_automaton(rule_number, backend=None, rows=HEIGHT // CELL_SIZE, cols=WIDTH // CELL_SIZE):
+    """
+    Izračuna sliko 1D avtomata z izvedbo iz registra: vrstica r je generacija r,
+    enako kot oned.run_automaton_1D. Vrstice se računajo z izbrano izvedbo (engine.backend).
+    """
+    engine = engines.create("oned", rows, cols, rule_number, backend=backend)
+    grid = np.zeros((rows, cols), dtype=int)
+    grid[0] = engine.initial_grid()[-1]
+    for r in range(1, rows):
+        grid[r] = engine.backend.next_row(grid[r - 1])
+    return grid
 
-def main():
+def main(life_backend=None, oned_backend=None, rows=HEIGHT // CELL_SIZE, cols=WIDTH // CELL_SIZE):
     pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Celični avtomati")
@@ -110,6 +89,10 @@ def main():
     running = True
     rule_input = ""
     valid_1d_grid = None
+    viewport_1d = None
+    # None pomeni samodejno izbiro izvedbe, tipka B vsili eno od registriranih.
+    life_backends = [None] + engines.backends("life")
+    oned_backends = [None] + engines.backends("oned")
 
     while running:
         clock.tick(FPS)
@@ -126,6 +109,12 @@ def main():
                         state = GameState.GAME_OF_LIFE
                     elif event.key == pygame.K_3:
                         state = GameState.SIMULATE_2D
+                    elif event.key == pygame.K_b:
+                        index = life_backends.index(life_backend)
+                        life_backend = life_backends[(index + 1) % len(life_backends)]
+                    elif event.key == pygame.K_v:
+                        index = oned_backends.index(oned_backend)
+                        oned_backend = oned_backends[(index + 1) % len(oned_backends)]
                     elif event.key == pygame.K_ESCAPE:
                         running = False
 
@@ -135,12 +124,8 @@ def main():
                         try:
                             rule_number = int(rule_input)
                             if 0 <= rule_number <= 255:
-                                valid_1d_grid = run_automaton_1D(
-                                    rule_number,
-                                    WIDTH,
-                                    HEIGHT,
-                                    CELL_SIZE
-                                )
+                                valid_1d_grid = compute_1D_automaton(rule_number, oned_backend, rows, cols)
+                                viewport_1d = Viewport(*valid_1d_grid.shape)
                                 state = GameState.SIMULATE_1D
                         except ValueError:
                             pass
@@ -153,6 +138,8 @@ def main():
                             rule_input += event.unicode
 
             elif state == GameState.SIMULATE_1D:
+                if viewport_1d.handle_event(event):
+                    continue
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                     state = GameState.MENU
 
@@ -162,7 +149,9 @@ def main():
             draw_text_centered(screen, "1: 1D celični avtomat (vnesi pravilo)", FONT_MENU, WHITE, WIDTH // 2, HEIGHT // 2 - 40)
             draw_text_centered(screen, "2: Game of Life", FONT_MENU, WHITE, WIDTH // 2, HEIGHT // 2)
             draw_text_centered(screen, "3: 2D celični avtomat (Wall/Sand/Fire)", FONT_MENU, WHITE, WIDTH // 2, HEIGHT // 2 + 40)
-            draw_text_centered(screen, "ESC: Izhod", FONT_MENU, WHITE, WIDTH // 2, HEIGHT // 2 + 100)
+            draw_text_centered(screen, f"V: Izvedba 1D ({oned_backend or 'samodejno'})", FONT_MENU, WHITE, WIDTH // 2, HEIGHT // 2 + 80)
+            draw_text_centered(screen, f"B: Izvedba Game of Life ({life_backend or 'samodejno'})", FONT_MENU, WHITE, WIDTH // 2, HEIGHT // 2 + 110)
+            draw_text_centered(screen, "ESC: Izhod", FONT_MENU, WHITE, WIDTH // 2, HEIGHT // 2 + 150)
             pygame.display.flip()
 
         elif state == GameState.ENTER_RULE:
@@ -174,10 +163,10 @@ def main():
 
         elif state == GameState.SIMULATE_1D:
             if valid_1d_grid is not None:
-                draw_1D_automaton(screen, valid_1d_grid, CELL_SIZE, color=BLACK, background=WHITE)
+                draw_1D_automaton(screen, valid_1d_grid, CELL_SIZE, color=BLACK, background=WHITE, viewport=viewport_1d)
 
         elif state == GameState.GAME_OF_LIFE:
-            run_game_of_life()
+            run_game_of_life(life_backend, rows, cols)
             state = GameState.MENU
 
         elif state == GameState.SIMULATE_2D:
@@ -188,4 +177,16 @@ def main():
     sys.exit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Celični avtomati")
+    parser.add_argument("--backend", choices=engines.backends("life"),
+                        help="vsili izvedbo Game of Life (privzeto samodejna izbira)")
+    parser.add_argument("--oned-backend", choices=engines.backends("oned"),
+                        help="vsili izvedbo 1D avtomata (privzeto samodejna izbira)")
+    parser.add_argument("--rows", type=int, default=HEIGHT // CELL_SIZE,
+                        help="število vrstic mreže za Game of Life in 1D avtomat (lahko večje od okna)")
+    parser.add_argument("--cols", type=int, default=WIDTH // CELL_SIZE,
+                        help="število stolpcev mreže za Game of Life in 1D avtomat")
+    args = parser.parse_args()
+    if args.rows < 1 or args.cols < 1:
+        parser.error("--rows and --cols must be positive")
+    main(args.backend, args.oned_backend, args.rows, args.cols)
\ No newline at end of file
@@ -1,5 +1,6 @@
 import numpy as np
 import pygame
+from viewport import density_colorizer
 
 def generate_rule(rule_number):
     binary_string = format(rule_number, '08b')
@@ -20,19 +21,31 @@ def run_automaton_1D(rule_number, width, height, cell_size):
 
     rule = generate_rule(rule_number)
 
-  #neciklično :)
     for r in range(1, rows):
-        for c in range(1, cols - 1):
-            left  = grid[r - 1, c - 1]
-            mid   = grid[r - 1, c]
-            right = grid[r - 1, c + 1]
-            grid[r, c] = rule.get((left, mid, right), 0)
+        grid[r] = next_row(grid[r - 1], rule)
 
     return grid
 
 
-def draw_1D_automaton(screen, grid, cell_size, color, background):
+def next_row(prev, rule):
+    cols = len(prev)
+    row = np.zeros(cols, dtype=int)
+
+  #neciklično :)
+    for c in range(1, cols - 1):
+        left  = prev[c - 1]
+        mid   = prev[c]
+        right = prev[c + 1]
+        row[c] = rule.get((left, mid, right), 0)
+    return row
+
+
+def draw_1D_automaton(screen, grid, cell_size, color, background, viewport=None):
     screen.fill(background)
+    if viewport is not None:
+        viewport.draw(screen, grid, density_colorizer(color, background))
+        pygame.display.flip()
+        return
     rows, cols = grid.shape
 
     for r in range(rows):
@@ -0,0 +1,275 @@
+import numpy as np
+from constants import MEMO_1D_MAX_CACHE
+
+WORD_BITS = 64
+_WORD_MASK = (1 << WORD_BITS) - 1
+LEAF_LEVEL = 6            # list drevesa pokriva 2^6 = 64 celic (ena beseda)
+
+
+def rule_function(rule_number):
+    """
+    Pretvori številko pravila (0-255) v bitno funkcijo f(left, mid, right, ones),
+    ki hkrati izračuna nova stanja za vse celice, zapakirane po bitih (64 celic na besedo).
+    'ones' je maska samih enic (Python int ali numpy.uint64), ki služi za negacijo.
+    """
+    minterms = [i for i in range(8) if (rule_number >> i) & 1]
+
+    def f(left, mid, right, ones):
+        out = left & 0
+        for i in minterms:
+            l = left if i & 4 else left ^ ones
+            m = mid if i & 2 else mid ^ ones
+            r = right if i & 1 else right ^ ones
+            out = out | (l & m & r)
+        return out
+    return f
+
+
+def pack_row(row):
+    """Zapakira vrstico 0/1 v tabelo uint64 (celica i je bit i % 64 besede i // 64)."""
+    bits = np.packbits(np.asarray(row, dtype=np.uint8), bitorder="little")
+    bits = np.pad(bits, (0, -len(bits) % 8))
+    return bits.view(np.uint64).copy()
+
+
+def unpack_row(words, cols):
+    bits = np.unpackbits(words.view(np.uint8), bitorder="little")
+    return bits[:cols].astype(int)
+
+
+def step_packed(words, cols, f):
+    """
+    En korak 1D avtomata nad zapakirano vrstico dolžine cols.
+    Robni celici (prva in zadnja) ostaneta 0, enako kot v oned.run_automaton_1D.
+    """
+    one = np.uint64(1)
+    top = np.uint64(WORD_BITS - 1)
+    left = words << one
+    left[1:] |= words[:-1] >> top
+    right = words >> one
+    right[:-1] |= words[1:] << top
+    out = f(left, words, right, np.uint64(_WORD_MASK))
+    last = cols - 1
+    out[0] &= ~one
+    out[last // WORD_BITS] &= ~(one << np.uint64(last % WORD_BITS))
+    if cols % WORD_BITS:
+        out[-1] &= (one << np.uint64(cols % WORD_BITS)) - one
+    return out
+
+
+def run_packed(row, rule_number, generations):
+    """Napreduje vrstico za 'generations' korakov z bitno vzporednim izračunom."""
+    cols = len(row)
+    f = rule_function(rule_number)
+    words = pack_row(row)
+    for _ in range(generations):
+        words = step_packed(words, cols, f)
+    return unpack_row(words, cols)
+
+
+class Node:
+    """
+    Vozlišče drevesa (1D analog HashLife): pokriva 2^level celic.
+    Listi (level == LEAF_LEVEL) hranijo 64 celic v 'value', notranja vozlišča pa levo in desno polovico.
+    Vozlišča so enolična (hash-consing), zato je enakost kar identiteta objekta.
+    """
+    __slots__ = ("level", "left", "right", "value", "population")
+
+    def __init__(self, level, left=None, right=None, value=0):
+        self.level = level
+        self.left = left
+        self.right = right
+        self.value = value
+        if left is None:
+            self.population = bin(value).count("1")
+        else:
+            self.population = left.population + right.population
+
+
+class HashLife1D:
+    """
+    Memoiziran pogon za elementarne 1D avtomate na neskončni vrstici z ničelnim ozadjem.
+
+    Vrstica se razdeli v binarno drevo blokov. Za vozlišče velikosti 2^k se v predpomnilnik shrani
+    njegova sredinska polovica po 2^j generacijah (j <= k - 2), zato se ponavljajoči se vzorci
+    izračunajo samo enkrat. Najmanjši bloki (128 celic) se računajo bitno vzporedno.
+
+    Args:
+        rule_number (int): pravilo 0-255; pravilo mora ohranjati prazno ozadje (000 -> 0)
+        max_cache (int): največje število shranjenih rezultatov; ob prekoračitvi se predpomnilnik izprazni
+    """
+
+    def __init__(self, rule_number, max_cache=MEMO_1D_MAX_CACHE):
+        if rule_number & 1:
+            raise ValueError("rule must map 000 -> 0 (even rule number) for an empty background")
+        self.rule_number = rule_number
+        self.max_cache = max_cache
+        self._f = rule_function(rule_number)
+        self._leaves = {}
+        self._nodes = {}
+        self._results = {}
+        self._zero = {}
+        self.hits = 0
+        self.misses = 0
+        self.clears = 0
+
+    # ------------------------ Vozlišča ------------------------
+    def leaf(self, value):
+        node = self._leaves.get(value)
+        if node is None:
+            node = self._leaves[value] = Node(LEAF_LEVEL, value=value)
+        return node
+
+    def join(self, left, right):
+        key = (left, right)
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = Node(left.level + 1, left, right)
+        return node
+
+    def zero(self, level):
+        node = self._zero.get(level)
+        if node is None:
+            if level == LEAF_LEVEL:
+                node = self.leaf(0)
+            else:
+                child = self.zero(level - 1)
+                node = self.join(child, child)
+            self._zero[level] = node
+        return node
+
+    def from_row(self, row):
+        """Zgradi drevo iz vrstice 0/1; dolžina se dopolni z ničlami do potence 2 (vsaj 128)."""
+        words = [int(w) for w in pack_row(row)]
+        size = 2
+        while size < len(words):
+            size *= 2
+        words += [0] * (size - len(words))
+        nodes = [self.leaf(w) for w in words]
+        while len(nodes) > 1:
+            nodes = [self.join(nodes[i], nodes[i + 1]) for i in range(0, len(nodes), 2)]
+        return nodes[0]
+
+    def to_row(self, node, start, stop, offset=0):
+        """Vrne celice [start, stop) vozlišča, ki se začne na koordinati 'offset', kot seznam bitov."""
+        size = 1 << node.level
+        lo, hi = max(start, offset), min(stop, offset + size)
+        if lo >= hi:
+            return []
+        if node.population == 0:
+            return [0] * (hi - lo)
+        if node.left is None:
+            return [(node.value >> (i - offset)) & 1 for i in range(lo, hi)]
+        half = size // 2
+        return (self.to_row(node.left, start, stop, offset)
+                + self.to_row(node.right, start, stop, offset + half))
+
+    def _center(self, node):
+        """Sredinska polovica vozlišča (brez napredovanja v času)."""
+        if node.level == LEAF_LEVEL + 1:
+            half = WORD_BITS // 2
+            value = (node.left.value >> half) | ((node.right.value << half) & _WORD_MASK)
+            return self.leaf(value)
+        return self.join(node.left.right, node.right.left)
+
+    # ------------------------ Napredovanje ------------------------
+    def _remember(self, key, node):
+        if len(self._results) >= self.max_cache:
+            # Tako kot v HashLife se ob polnem predpomnilniku ta preprosto izprazni.
+            self._results.clear()
+            self._nodes.clear()
+            self._leaves.clear()
+            self._zero.clear()
+            self.clears += 1
+        self._results[key] = node
+
+    def _base(self, node, j):
+        """Vozlišče s 128 celicami: 2^j korakov bitno vzporedno, vrne sredinskih 64 celic."""
+        width = 2 * WORD_BITS
+        ones = (1 << width) - 1
+        x = node.left.value | (node.right.value << WORD_BITS)
+        for _ in range(1 << j):
+            x = self._f((x << 1) & ones, x, x >> 1, ones)
+        return self.leaf((x >> (WORD_BITS // 2)) & _WORD_MASK)
+
+    def step(self, node, j):
+        """
+        Vrne sredinsko polovico vozlišča (nivo level - 1) po 2^j generacijah, j <= level - 2.
+        """
+        if node.population == 0:
+            return self.zero(node.level - 1)
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+
+        if node.level == LEAF_LEVEL + 1:
+            result = self._base(node, j)
+        else:
+            q0, q1 = node.left.left, node.left.right
+            q2, q3 = node.right.left, node.right.right
+            n0, n1, n2 = self.join(q0, q1), self.join(q1, q2), self.join(q2, q3)
+            if j == node.level - 2:
+                # Dve polovični fazi, vsaka napreduje za 2^(j-1) generacij.
+                r0, r1, r2 = self.step(n0, j - 1), self.step(n1, j - 1), self.step(n2, j - 1)
+                result = self.join(self.step(self.join(r0, r1), j - 1),
+                                   self.step(self.join(r1, r2), j - 1))
+            else:
+                # Prva faza le izreže sredino, druga napreduje za celih 2^j generacij.
+                r0, r1, r2 = self._center(n0), self._center(n1), self._center(n2)
+                result = self.join(self.step(self.join(r0, r1), j),
+                                   self.step(self.join(r1, r2), j))
+        self._remember(key, result)
+        return result
+
+    def advance(self, row, generations):
+        """
+        Napreduje vrstico za 'generations' korakov na neskončni vrstici z ničelnim ozadjem
+        in vrne celice na istih koordinatah kot vhodna vrstica (numpy tabela 0/1).
+        """
+        cols = len(row)
+        live = np.flatnonzero(row)
+        if len(live) == 0 or generations == 0:
+            return np.asarray(row, dtype=int).copy()
+        lo, hi = int(live[0]), int(live[-1]) + 1
+        root = self.from_row(row)
+        origin = 0
+        remaining = generations
+        while remaining:
+            j = remaining.bit_length() - 1
+            # Razširi koren, dokler ni j <= level - 2 in živi del po 2^j korakih ostane v sredinski polovici.
+            while True:
+                quarter = 1 << (root.level - 2)
+                if (j <= root.level - 2 and lo - (1 << j) >= origin + quarter
+                        and hi + (1 << j) <= origin + 3 * quarter):
+                    break
+                z = self.zero(root.level - 1)
+                origin -= 1 << (root.level - 1)
+                root = self.join(self.join(z, root.left), self.join(root.right, z))
+            root = self.step(root, j)
+            origin += 1 << (root.level - 1)
+            lo, hi = lo - (1 << j), hi + (1 << j)
+            remaining -= 1 << j
+        return self._window(root, origin, cols)
+
+    def _window(self, root, origin, cols):
+        out = np.zeros(cols, dtype=int)
+        lo, hi = max(0, origin), min(cols, origin + (1 << root.level))
+        if lo < hi:
+            out[lo:hi] = self.to_row(root, lo, hi, origin)
+        return out
+
+    def stats(self):
+        """Statistika predpomnilnika: zadetki, zgrešitve, delež zadetkov in velikosti tabel."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "cache_size": len(self._results),
+            "max_cache": self.max_cache,
+            "nodes": len(self._nodes) + len(self._leaves),
+            "clears": self.clears,
+        }
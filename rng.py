@@ -0,0 +1,86 @@
+import itertools
+import numpy as np
+
+# Konstante generatorja Philox4x32-10 (Salmon et al., "Parallel Random Numbers: As Easy as 1, 2, 3").
+PHILOX_M0 = np.uint64(0xD2511F53)
+PHILOX_M1 = np.uint64(0xCD9E8D57)
+PHILOX_W0 = 0x9E3779B9
+PHILOX_W1 = 0xBB67AE85
+PHILOX_ROUNDS = 10
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHIFT32 = np.uint64(32)
+
+
+def philox4x32(counter, key, rounds=PHILOX_ROUNDS):
+    """
+    Vektoriziran Philox4x32: vsak števec (4 x uint32) preslika v 4 psevdonaključne uint32.
+
+    Args:
+        counter: seznam 4 tabel (ali skalarjev) uint32 enake oblike
+        key: par 32-bitnih celih števil
+    Vrne:
+        seznam 4 tabel uint32
+    """
+    c0, c1, c2, c3 = (np.asarray(x, dtype=np.uint64) for x in counter)
+    k0, k1 = int(key[0]) & 0xFFFFFFFF, int(key[1]) & 0xFFFFFFFF
+    for _ in range(rounds):
+        p0 = PHILOX_M0 * c0
+        p1 = PHILOX_M1 * c2
+        c0, c1, c2, c3 = (
+            (p1 >> _SHIFT32) ^ c1 ^ np.uint64(k0),
+            p1 & _MASK32,
+            (p0 >> _SHIFT32) ^ c3 ^ np.uint64(k1),
+            p0 & _MASK32,
+        )
+        k0 = (k0 + PHILOX_W0) & 0xFFFFFFFF
+        k1 = (k1 + PHILOX_W1) & 0xFFFFFFFF
+    return [x.astype(np.uint32) for x in (c0, c1, c2, c3)]
+
+
+class CounterRNG:
+    """
+    Števčni generator naključnih števil.
+    Vsako število je določeno le s ključem (seme) in števcem (generacija, indeks celice, namen),
+    zato je rezultat neodvisen od vrstnega reda obdelave celic, razdelitve na ploščice ali števila niti.
+    """
+
+    def __init__(self, seed=0):
+        self.seed = int(seed)
+
+    def field(self, generation, purpose, shape, rows=None, cols=None):
+        """
+        Vrne tabelo uint32 z enim naključnim številom za vsako celico mreže oblike 'shape'.
+        Z rezinama rows in cols se izračuna le del mreže (npr. ploščica enega delavca);
+        vrednosti so enake kot v istem izrezu celotnega polja.
+        """
+        height, width = shape
+        r = np.arange(height, dtype=np.uint64)[rows if rows is not None else slice(None)]
+        c = np.arange(width, dtype=np.uint64)[cols if cols is not None else slice(None)]
+        index = r[:, None] * np.uint64(width) + c[None, :]
+        counter = (
+            index & _MASK32,
+            index >> _SHIFT32,
+            np.uint64(generation & 0xFFFFFFFF),
+            np.uint64(purpose & 0xFFFFFFFF),
+        )
+        key = (self.seed & 0xFFFFFFFF, (self.seed >> 32) & 0xFFFFFFFF)
+        return philox4x32(counter, key)[0]
+
+    def uniform(self, generation, purpose, shape, rows=None, cols=None):
+        """Vrne enakomerno porazdeljena števila v [0, 1) za vsako celico."""
+        return self.field(generation, purpose, shape, rows, cols) * (1.0 / 2 ** 32)
+
+
+_PERMUTATIONS = {n: list(itertools.permutations(range(n))) for n in range(4)}
+
+
+def choice(items, value):
+    """Izbere element iz 'items' z naključnim številom 'value' (namesto random.choice)."""
+    return items[int(value) % len(items)]
+
+
+def shuffled(items, value):
+    """Vrne premešan seznam (do 3 elementi) z naključnim številom 'value' (namesto random.shuffle)."""
+    perms = _PERMUTATIONS[len(items)]
+    perm = perms[int(value) % len(perms)]
+    return [items[i] for i in perm]
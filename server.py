@@ -0,0 +1,306 @@
+"""
+Strežnik, ki simulacijo poganja brez okna in sličice pošilja več oddaljenim gledalcem.
+
+Uporaba:
+    python server.py --engine life --rows 300 --cols 400 --port 8765
+    python server.py --engine twod --unix /tmp/ca.sock
+
+Protokol (vsako sporočilo ima glavo HEADER, nato "length" bajtov vsebine):
+    MSG_HELLO    - JSON z imenom pogona in velikostjo mreže (prvo sporočilo)
+    MSG_KEYFRAME - zlib(celotna sličica)
+    MSG_DELTA    - zlib(XOR s sličico, ki jo je ta odjemalec nazadnje prejel)
+Sličica so bajti mreže (uint8), pri pogonu twod pa ji sledi še kvantizirana količina vode.
+Posnetek (--record) je isto zaporedje sporočil, zapisano v datoteko.
+"""
+import argparse
+import asyncio
+import json
+import socket
+import struct
+import zlib
+import numpy as np
+from constants import (
+    ROWS, COLS, MAX_WATER_CAPACITY, STREAM_PORT, STREAM_KEYFRAME_INTERVAL, STREAM_SEND_BUFFER,
+    STREAM_CLOSE_TIMEOUT
+)
+import engines
+
+MSG_HELLO = 0
+MSG_KEYFRAME = 1
+MSG_DELTA = 2
+
+# tip sporočila, generacija, dolžina vsebine
+HEADER = struct.Struct(">BII")
+
+
+def encode_frame(engine, grid):
+    """Pretvori stanje pogona v bajte sličice (mreža kot uint8, pri twod še voda)."""
+    data = grid.astype(np.uint8).tobytes()
+    if engine == "twod":
+        import twod
+        water = np.minimum(twod.water_levels, MAX_WATER_CAPACITY) / MAX_WATER_CAPACITY
+        data += (water * 255).astype(np.uint8).tobytes()
+    return data
+
+
+def encode_message(kind, generation, payload):
+    return HEADER.pack(kind, generation, len(payload)) + payload
+
+
+class FrameDecoder:
+    """
+    Na strani odjemalca iz zaporedja sporočil sestavlja sličice.
+    Delta se lahko uporabi le na sličici, ki jo je ta odjemalec prejel zadnjo.
+    """
+
+    def __init__(self):
+        self.hello = None
+        self.frame = None
+        self.generation = 0
+        self.delta = None   # XOR zadnje delte (None po keyframe)
+
+    def feed(self, kind, generation, payload):
+        """Obdela eno sporočilo; vrne True, če je na voljo nova sličica."""
+        if kind == MSG_HELLO:
+            self.hello = json.loads(payload.decode("utf-8"))
+            return False
+        data = np.frombuffer(zlib.decompress(payload), dtype=np.uint8)
+        self.delta = None
+        if kind == MSG_DELTA:
+            self.delta = data
+            data = np.bitwise_xor(self.frame, data)
+        self.frame = data
+        self.generation = generation
+        return True
+
+    def grid(self, frame=None):
+        frame = self.frame if frame is None else frame
+        rows, cols = self.hello["rows"], self.hello["cols"]
+        return frame[:rows * cols].reshape(rows, cols).astype(int)
+
+    def water(self, frame=None):
+        frame = self.frame if frame is None else frame
+        rows, cols = self.hello["rows"], self.hello["cols"]
+        return frame[rows * cols:].reshape(rows, cols) / 255.0 * MAX_WATER_CAPACITY
+
+
+class DeltaEncoder:
+    """
+    Kodira zaporedje sličic za enega prejemnika: prva in vsaka keyframe_interval-ta sličica je
+    celotna, ostale so delta glede na sličico, ki jo je prejemnik nazadnje dobil.
+    """
+
+    def __init__(self, keyframe_interval=STREAM_KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.last_sent = None
+        self.since_keyframe = 0
+
+    def encode(self, generation, frame):
+        last, self.last_sent = self.last_sent, frame
+        if (last is None or len(last) != len(frame)
+                or self.since_keyframe >= self.keyframe_interval):
+            self.since_keyframe = 0
+            return encode_message(MSG_KEYFRAME, generation, zlib.compress(frame, 1))
+        self.since_keyframe += 1
+        delta = np.bitwise_xor(np.frombuffer(frame, dtype=np.uint8),
+                               np.frombuffer(last, dtype=np.uint8))
+        return encode_message(MSG_DELTA, generation, zlib.compress(delta.tobytes(), 1))
+
+
+class ClientStream:
+    """
+    Stanje pošiljanja enemu odjemalcu.
+    Hrani le zadnjo nepošiljeno sličico: če odjemalec ne sledi, se starejše sličice zavržejo,
+    zato počasen gledalec nikoli ne ustavi simulacije.
+    """
+
+    def __init__(self, writer, keyframe_interval):
+        self.writer = writer
+        self.encoder = DeltaEncoder(keyframe_interval)
+        self.pending = None
+        self.sent = 0
+        self.dropped = 0
+        self.finishing = False
+        self.ready = asyncio.Event()
+        self.closed = asyncio.Event()
+
+    def offer(self, generation, frame):
+        if self.pending is not None:
+            self.dropped += 1
+        self.pending = (generation, frame)
+        self.ready.set()
+
+    def finish(self):
+        """Povezava se zapre, ko je poslana zadnja ponujena sličica."""
+        self.finishing = True
+        self.ready.set()
+
+    async def run(self):
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            if self.pending is not None:
+                generation, frame = self.pending
+                self.pending = None
+                self.writer.write(self.encoder.encode(generation, frame))
+                self.sent += 1
+                await self.writer.drain()
+            if self.finishing and self.pending is None:
+                return
+
+
+class FrameRecorder:
+    """Zapisuje vse sličice v datoteko v istem zapisu, kot ga uporablja pretakanje."""
+
+    def __init__(self, path, hello, keyframe_interval=STREAM_KEYFRAME_INTERVAL):
+        self.file = open(path, "wb")
+        self.encoder = DeltaEncoder(keyframe_interval)
+        self.file.write(hello)
+
+    def write(self, generation, frame):
+        self.file.write(self.encoder.encode(generation, frame))
+
+    def close(self):
+        self.file.close()
+
+
+def read_recording(path):
+    """
+    Bere posnetek in za vsako sličico vrne (decoder, generation, frame).
+    decoder.hello vsebuje ime pogona in velikost mreže.
+    """
+    decoder = FrameDecoder()
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            kind, generation, length = HEADER.unpack(header)
+            if decoder.feed(kind, generation, f.read(length)):
+                yield decoder, generation, decoder.frame
+
+
+class FrameServer:
+    """
+    Poganja izbrani pogon brez okna in vsako generacijo ponudi vsem povezanim odjemalcem.
+    Korak simulacije teče v ločeni niti, da lahko zanka asyncio medtem pošilja podatke.
+    """
+
+    def __init__(self, engine="life", rows=ROWS, cols=COLS, rule=30, fps=0,
+                 keyframe_interval=STREAM_KEYFRAME_INTERVAL, max_generations=None, seed=None,
+                 record=None, backend=None):
+        self.engine = engine
+        self.backend = engines.create(engine, rows, cols, rule, seed, backend)
+        self.grid = self.backend.initial_grid()
+        self.step = self.backend.step
+        self.fps = fps
+        self.keyframe_interval = keyframe_interval
+        self.max_generations = max_generations
+        self.generation = 0
+        self.clients = set()
+        self.finished = False
+        self.frame = encode_frame(engine, self.grid)
+        self.recorder = None
+        if record:
+            self.recorder = FrameRecorder(record, self.hello(), keyframe_interval)
+            self.recorder.write(self.generation, self.frame)
+
+    def hello(self):
+        rows, cols = self.grid.shape
+        info = {"engine": self.engine, "rows": rows, "cols": cols}
+        return encode_message(MSG_HELLO, self.generation, json.dumps(info).encode("utf-8"))
+
+    async def handle_client(self, reader, writer):
+        # Majhen oddajni medpomnilnik in brez medpomnilnika v transportu: drain() počaka, dokler
+        # odjemalec podatkov ne prebere, zato se zastarele sličice zavržejo namesto da čakajo v vrsti.
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, STREAM_SEND_BUFFER)
+        writer.transport.set_write_buffer_limits(high=0)
+        client = ClientStream(writer, self.keyframe_interval)
+        self.clients.add(client)
+        try:
+            writer.write(self.hello())
+            client.offer(self.generation, self.frame)
+            if self.finished:
+                client.finish()
+            await client.run()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+            client.closed.set()
+
+    async def simulate(self):
+        delay = 1.0 / self.fps if self.fps else 0
+        while self.max_generations is None or self.generation < self.max_generations:
+            self.grid = await asyncio.to_thread(self.step, self.grid)
+            self.generation += 1
+            self.frame = encode_frame(self.engine, self.grid)
+            for client in list(self.clients):
+                client.offer(self.generation, self.frame)
+            if self.recorder is not None:
+                self.recorder.write(self.generation, self.frame)
+            await asyncio.sleep(delay)
+        # Odjemalci prejmejo še zadnjo sličico, nato se njihove povezave zaprejo (EOF).
+        self.finished = True
+        for client in list(self.clients):
+            client.finish()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    async def close_clients(self, timeout=STREAM_CLOSE_TIMEOUT):
+        """
+        Počaka, da se povezave po koncu simulacije zaprejo; tiste, ki v 'timeout' sekundah ne
+        preberejo zadnje sličice, prekine.
+        """
+        waiters = [asyncio.create_task(client.closed.wait()) for client in list(self.clients)]
+        if waiters:
+            await asyncio.wait(waiters, timeout=timeout)
+        for waiter in waiters:
+            waiter.cancel()
+        remaining = list(self.clients)
+        for client in remaining:
+            client.writer.transport.abort()
+        await asyncio.gather(*(client.closed.wait() for client in remaining))
+
+    async def start(self, host="127.0.0.1", port=STREAM_PORT, unix_path=None):
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    async def serve(self, host="127.0.0.1", port=STREAM_PORT, unix_path=None):
+        server = await self.start(host, port, unix_path)
+        async with server:
+            await self.simulate()
+            await self.close_clients()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pretakanje sličic celičnega avtomata")
+    parser.add_argument("--engine", choices=sorted(engines.REGISTRY), default="life")
+    parser.add_argument("--backend", help="vsili izvedbo pogona (privzeto samodejna izbira)")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--rule", type=int, default=30, help="pravilo za pogon oned")
+    parser.add_argument("--fps", type=float, default=0, help="omejitev hitrosti (0 = brez)")
+    parser.add_argument("--seed", type=int, help="seme za ponovljiv zagon pogona twod")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=STREAM_PORT)
+    parser.add_argument("--unix", help="pot do Unix vtičnice namesto TCP")
+    parser.add_argument("--record", help="vse sličice zapiši tudi v datoteko posnetka")
+    parser.add_argument("--generations", type=int, help="ustavi po tolikšnem številu generacij")
+    args = parser.parse_args()
+
+    try:
+        server = FrameServer(args.engine, args.rows, args.cols, args.rule, args.fps, seed=args.seed,
+                             max_generations=args.generations, record=args.record,
+                             backend=args.backend)
+    except ValueError as e:
+        parser.error(str(e))
+    asyncio.run(server.serve(args.host, args.port, args.unix))
+
+
+if __name__ == "__main__":
+    main()
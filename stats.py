@@ -0,0 +1,78 @@
+import csv
+import numpy as np
+import pygame
+from constants import STATS_CAPACITY
+
+
+class StatsHistory:
+    """
+    Krožni medpomnilnik fiksne velikosti za časovne vrste statistik simulacije.
+    Vsak vzorec je ena vrstica s stolpci "step" in podanimi imeni polj.
+    Ko je medpomnilnik poln, novi vzorci prepišejo najstarejše.
+    """
+
+    def __init__(self, fields, capacity=STATS_CAPACITY):
+        self.fields = ("step",) + tuple(fields)
+        self._index = {name: i for i, name in enumerate(self.fields)}
+        self._data = np.zeros((capacity, len(self.fields)), dtype=float)
+        self.capacity = capacity
+        self.total = 0
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def clear(self):
+        self.total = 0
+
+    def record(self, **values):
+        """Doda vzorec; manjkajoča polja so 0, korak se šteje samodejno."""
+        row = self._data[self.total % self.capacity]
+        row[:] = 0
+        row[0] = self.total
+        for name, value in values.items():
+            row[self._index[name]] = value
+        self.total += 1
+
+    def to_numpy(self):
+        """Vrne kopijo vseh shranjenih vzorcev v časovnem vrstnem redu (vrstice x polja)."""
+        if self.total <= self.capacity:
+            return self._data[:self.total].copy()
+        start = self.total % self.capacity
+        return np.concatenate([self._data[start:], self._data[:start]])
+
+    def series(self, name, last=None):
+        """Vrne časovno vrsto enega polja (po potrebi le zadnjih 'last' vzorcev)."""
+        n = len(self)
+        if last is not None:
+            n = min(n, last)
+        idx = (np.arange(self.total - n, self.total) % self.capacity)
+        return self._data[idx, self._index[name]]
+
+    def to_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.fields)
+            for row in self.to_numpy():
+                writer.writerow([int(v) if v == int(v) else v for v in row])
+
+    def save(self, path):
+        """Shrani vzorce kot NumPy (.npz) z imeni stolpcev."""
+        np.savez(path, data=self.to_numpy(), fields=np.array(self.fields))
+
+
+def draw_sparkline(surface, values, rect, color, background=None):
+    """
+    Nariše majhen graf (sparkline) vrednosti v pravokotnik rect = (x, y, w, h).
+    Vrednosti se raztegnejo med najmanjšo in največjo vrednost.
+    """
+    x, y, w, h = rect
+    if background is not None:
+        pygame.draw.rect(surface, background, rect)
+    if len(values) < 2:
+        return
+    values = np.asarray(values, dtype=float)[-w:]
+    lo, hi = values.min(), values.max()
+    span = hi - lo if hi > lo else 1.0
+    xs = x + np.linspace(0, w - 1, len(values))
+    ys = y + h - 1 - (values - lo) / span * (h - 1)
+    pygame.draw.lines(surface, color, False, list(zip(xs.tolist(), ys.tolist())))
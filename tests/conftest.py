@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Moduli projekta so v korenski mapi; pygame naj ne odpira okna.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,41 @@
+import numpy as np
+import twod
+from constants import ROWS, COLS, INITIAL_LIVE_RATIO, INITIAL_SAND_RATIO
+from rng import CounterRNG
+
+
+def test_field_block_matches_full_field():
+    rng = CounterRNG(1234)
+    full = rng.field(7, 2, (50, 70))
+    block = rng.field(7, 2, (50, 70), rows=slice(10, 33), cols=slice(41, 70))
+    assert np.array_equal(block, full[10:33, 41:70])
+
+
+def run_twod(seed, generations=15):
+    """Zažene 2D simulacijo s podanim semenom in vrne končno mrežo, vodo in časovnike dima."""
+    twod.set_seed(seed)
+    grid = twod.create_initial_grid(ROWS, COLS, INITIAL_LIVE_RATIO, INITIAL_SAND_RATIO)
+    twod.water_levels[:] = 0
+    twod.smoke_timer[:] = 0
+    # Nekaj ognja, lesa in vode, da se uporabijo vsi nameni naključnih števil.
+    for c in range(10, 30):
+        twod.paint_cell(grid, 5, c, 3)
+        twod.paint_cell(grid, 6, c, 4)
+        twod.paint_cell(grid, 2, c + 30, 7)
+        twod.paint_cell(grid, ROWS - 3, c + 50, 8)
+    for generation in range(generations):
+        grid = twod.next_generation(grid, generation)
+    return grid.copy(), twod.water_levels.copy(), twod.smoke_timer.copy()
+
+
+def test_twod_is_reproducible_with_same_seed():
+    first = run_twod(42)
+    second = run_twod(42)
+    for a, b in zip(first, second):
+        assert np.array_equal(a, b)
+
+
+def test_twod_differs_with_different_seed():
+    first = run_twod(42)
+    other = run_twod(43)
+    assert not all(np.array_equal(a, b) for a, b in zip(first, other))
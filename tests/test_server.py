@@ -0,0 +1,116 @@
+import asyncio
+import socket
+import numpy as np
+from server import HEADER, FrameDecoder, FrameServer
+
+GENERATIONS = 200
+
+
+async def read_frame(reader, decoder):
+    kind, generation, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return decoder.feed(kind, generation, await reader.readexactly(length))
+
+
+async def fast_client(port, generations):
+    """Bere vse, kar strežnik pošlje, dokler ne prejme zadnje generacije."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    decoder = FrameDecoder()
+    frames = 0
+    while decoder.generation != generations:
+        if await read_frame(reader, decoder):
+            frames += 1
+    writer.close()
+    return decoder, frames
+
+
+async def open_slow_client(port):
+    """
+    Poveže se z majhnim sprejemnim medpomnilnikom in (za zdaj) ničesar ne bere.
+    Uporablja golo vtičnico, ker bi asyncio.StreamReader podatke bral sproti v svoj medpomnilnik.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+    return sock
+
+
+async def recv_exact(sock, n):
+    loop = asyncio.get_running_loop()
+    data = bytearray()
+    while len(data) < n:
+        chunk = await loop.sock_recv(sock, n - len(data))
+        assert chunk, "server closed the connection"
+        data += chunk
+    return bytes(data)
+
+
+async def read_slow_frame(sock, decoder):
+    kind, generation, length = HEADER.unpack(await recv_exact(sock, HEADER.size))
+    return decoder.feed(kind, generation, await recv_exact(sock, length))
+
+
+async def run_scenario():
+    # Vsaka sličica je celotna (keyframe), da so sporočila dovolj velika za polnjenje medpomnilnikov.
+    # Vsiljena izvedba, da test ne sproži merjenja hitrosti (in ne piše v ENGINE_CALIBRATION_PATH).
+    srv = FrameServer("life", 60, 80, keyframe_interval=0, max_generations=GENERATIONS,
+                      backend="vectorized")
+    server = await srv.start(port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    slow = await open_slow_client(port)
+    fast = [asyncio.create_task(fast_client(port, GENERATIONS)) for _ in range(3)]
+    while len(srv.clients) < 4:
+        await asyncio.sleep(0.01)
+    streams = list(srv.clients)
+
+    # Simulacija se mora končati, čeprav počasni odjemalec ne bere.
+    await asyncio.wait_for(srv.simulate(), timeout=60)
+    dropped = max(client.dropped for client in streams)
+    results = await asyncio.wait_for(asyncio.gather(*fast), timeout=30)
+
+    # Ko počasni odjemalec začne brati, dobi zadnjo generacijo, ne pa vseh vmesnih.
+    decoder = FrameDecoder()
+    slow_frames = 0
+    while decoder.generation != GENERATIONS:
+        if await asyncio.wait_for(read_slow_frame(slow, decoder), timeout=30):
+            slow_frames += 1
+    # Po zadnji sličici strežnik povezavo zapre.
+    eof = await asyncio.wait_for(asyncio.get_running_loop().sock_recv(slow, 1), timeout=30)
+    slow.close()
+    server.close()
+    await server.wait_closed()
+    return srv, results, (decoder, slow_frames, eof), dropped
+
+
+def test_clients_receive_final_grid_and_slow_client_drops_frames():
+    srv, results, (slow_decoder, slow_frames, eof), dropped = asyncio.run(run_scenario())
+
+    for decoder, frames in results:
+        assert np.array_equal(decoder.grid(), srv.grid)
+        assert frames >= 1
+    assert np.array_equal(slow_decoder.grid(), srv.grid)
+    assert dropped > 0
+    assert slow_frames < GENERATIONS + 1
+    assert eof == b""
+
+
+async def run_close_scenario():
+    srv = FrameServer("life", 60, 80, keyframe_interval=0, max_generations=GENERATIONS,
+                      backend="vectorized")
+    server = await srv.start(port=0)
+    slow = await open_slow_client(server.sockets[0].getsockname()[1])
+    while not srv.clients:
+        await asyncio.sleep(0.01)
+    await srv.simulate()
+    # Odjemalec, ki ne bere, ne sme zadržati zaustavitve strežnika.
+    await asyncio.wait_for(srv.close_clients(timeout=0.2), timeout=10)
+    open_clients = len(srv.clients)
+    slow.close()
+    server.close()
+    await asyncio.wait_for(server.wait_closed(), timeout=10)
+    return open_clients
+
+
+def test_close_clients_disconnects_stalled_viewer():
+    assert asyncio.run(run_close_scenario()) == 0
@@ -8,12 +8,15 @@ from constants import (
     INITIAL_LIVE_RATIO,
     INITIAL_SAND_RATIO,
     SMOKE_LIFETIME,
-    BASE_COLOR_MAP
+    BASE_COLOR_MAP,
+    STATS_SPARKLINE_POINTS,
+    RNG_SEED
 )
+from viewport import Viewport, palette_colorizer, cell_regions
+from stats import StatsHistory, draw_sparkline
+from rng import CounterRNG, choice, shuffled
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("2D Cellular Automata: Wall/Sand/Fire/Wood/Smoke/Water/Balloon")
+screen = None
 clock = pygame.time.Clock()
 info_font = pygame.font.SysFont("Arial", 16)
 menu_font = pygame.font.SysFont("Arial", 18, bold=True)
@@ -23,28 +26,133 @@ water_levels = np.zeros((ROWS, COLS), dtype=float)
 
 selected_state = 3  
 
+MATERIAL_NAMES = {
+    1: "wall", 2: "sand", 3: "fire", 4: "wood",
+    5: "smoke", 6: "smoke_light", 7: "water", 8: "balloon"
+}
+
+# Števci, ki jih posodobitvene funkcije vzdržujejo sproti, brez ponovnega pregledovanja mreže.
+# population[m] je število celic z materialom m v mreži, ki se trenutno gradi (new_grid),
+# moves/births/deaths pa štejejo dogodke v zadnji generaciji.
+population = np.zeros(len(BASE_COLOR_MAP), dtype=np.int64)
+moves = np.zeros(len(BASE_COLOR_MAP), dtype=np.int64)
+births = np.zeros(len(BASE_COLOR_MAP), dtype=np.int64)
+deaths = np.zeros(len(BASE_COLOR_MAP), dtype=np.int64)
+totals = {"water_volume": 0.0}
+
+# Fronta gorenja: položaji celic z ognjem (3) v trenutni mreži, ki jih sproti vzdržuje _set,
+# in les ob njih, ki se v tej generaciji vžge. Tako je delo za ogenj sorazmerno dolžini fronte.
+burning = set()
+_igniting = set()
+changed_cells = set()   # celice, ki jih je _set spremenil od začetka zadnje generacije
+_last_grid = None   # zadnja mreža, ki jo je vrnil next_generation (za njo 'burning' velja)
+
+STATS_FIELDS = (
+    [f"{kind}_{name}" for name in MATERIAL_NAMES.values()
+     for kind in ("count", "moves", "births", "deaths")]
+    + ["water_volume", "smoke"]
+)
+history = StatsHistory(STATS_FIELDS)
+
+# Naključnost izhaja iz števčnega generatorja: vsaka celica dobi svoje število, določeno s
+# semenom, generacijo, indeksom celice in namenom, zato so naključna števila neodvisna od vrstnega
+# reda obdelave in razdelitve na ploščice. Sama pravila pa ostajajo zaporedna (celice pišejo v
+# skupni new_grid in water_levels), zato je rezultat ponovljiv le pri istem vrstnem redu obdelave.
+RNG_INIT = 0
+RNG_SAND = 1
+RNG_FIRE = 2
+RNG_SMOKE = 3
+RNG_BALLOON = 4
+
+rng = CounterRNG(RNG_SEED if RNG_SEED is not None else random.SystemRandom().getrandbits(64))
+generation_counter = 0
+_noise = {}
+
+def set_seed(seed):
+    """Nastavi seme generatorja in ponastavi števec generacij (za ponovljive zagone)."""
+    global rng, generation_counter
+    rng = CounterRNG(seed)
+    generation_counter = 0
+
+_base_colorize = palette_colorizer(BASE_COLOR_MAP)
+
 def create_initial_grid(rows, cols, wall_ratio, sand_ratio):
     grid = np.zeros((rows, cols), dtype=int)
+    population[:] = 0
+    noise = rng.uniform(0, RNG_INIT, (rows, cols))
     for r in range(rows):
         for c in range(cols):
-            rnd = random.random()
+            rnd = noise[r, c]
             if rnd < wall_ratio:
                 grid[r, c] = 1 
             elif rnd < wall_ratio + sand_ratio:
                 grid[r, c] = 2  
             else:
                 grid[r, c] = 0 
+            population[grid[r, c]] += 1
+    totals["water_volume"] = float(water_levels.sum())
+    burning.clear()
+    history.clear()
     return grid
 
+def _set(new_grid, r, c, state):
+    """Zapiše stanje v new_grid in sproti popravi števce populacije po materialih ter fronto gorenja."""
+    prev = new_grid[r, c]
+    if prev != state:
+        population[prev] -= 1
+        population[state] += 1
+        changed_cells.add((r, c))
+        if prev == 3:
+            burning.discard((r, c))
+        elif state == 3:
+            burning.add((r, c))
+        new_grid[r, c] = state
+
+def paint_cell(grid, r, c, state):
+    """
+    Ročno nastavi celico (risanje z miško) in posodobi števce.
+    Pri vodi se celica napolni do količine 1.0.
+    """
+    _set(grid, r, c, state)
+    if state == 7:
+        totals["water_volume"] += 1.0 - water_levels[r, c]
+        water_levels[r, c] = 1.0
+
+def restore_walls(grid, static_walls):
+    """
+    Vrne statične stene, ki jih je prepisalo risanje, nazaj v mrežo.
+    Gre prek _set, da ostanejo števci populacije in fronta gorenja usklajeni z mrežo.
+    """
+    for r, c in zip(*np.nonzero(static_walls & (grid != 1))):
+        if grid[r, c] == 7:
+            totals["water_volume"] -= water_levels[r, c]
+            water_levels[r, c] = 0
+        _set(grid, r, c, 1)
+
+def record_stats():
+    """Shrani števce zadnje generacije kot nov vzorec v krožni medpomnilnik 'history'."""
+    values = {}
+    for state, name in MATERIAL_NAMES.items():
+        values[f"count_{name}"] = population[state]
+        values[f"moves_{name}"] = moves[state]
+        values[f"births_{name}"] = births[state]
+        values[f"deaths_{name}"] = deaths[state]
+    values["water_volume"] = totals["water_volume"]
+    values["smoke"] = population[5] + population[6]
+    history.record(**values)
+
 def update_sand(old_grid, new_grid, r, c):
     rows, cols = old_grid.shape
     below = r + 1  
     
     if below < rows and (old_grid[below, c] == 0 or old_grid[below, c] == 7):
-        new_grid[below, c] = 2  
-        new_grid[r, c] = 0      
+        _set(new_grid, below, c, 2)
+        _set(new_grid, r, c, 0)
+        moves[2] += 1
 
         if old_grid[below, c] == 7:
+            deaths[7] += 1
+            totals["water_volume"] -= water_levels[below, c]
             water_levels[below, c] = 0
     else:
         candidates = []
@@ -54,11 +162,12 @@ def update_sand(old_grid, new_grid, r, c):
             if c + 1 < cols and old_grid[below, c+1] == 0:
                 candidates.append((below, c+1))
         if candidates:
-            nr, nc = random.choice(candidates)
-            new_grid[nr, nc] = 2
-            new_grid[r, c] = 0
+            nr, nc = choice(candidates, _noise[RNG_SAND][r, c])
+            _set(new_grid, nr, nc, 2)
+            _set(new_grid, r, c, 0)
+            moves[2] += 1
         else:
-            new_grid[r, c] = 2
+            _set(new_grid, r, c, 2)
 
 def update_fire(old_grid, new_grid, r, c):
     rows, cols = old_grid.shape
@@ -68,29 +177,59 @@ def update_fire(old_grid, new_grid, r, c):
         nr, nc = r + 1, c + dc
         if 0 <= nr < rows and 0 <= nc < cols:
             candidates.append((nr, nc))
-    random.shuffle(candidates) 
+    candidates = shuffled(candidates, _noise[RNG_FIRE][r, c])
     moved = False
     for (nr, nc) in candidates:
         target = old_grid[nr, nc]
 
         if target in (0, 2, 4):
             if target == 4:
-                new_grid[nr, nc] = 5 
+                _set(new_grid, nr, nc, 5)
+                births[5] += 1
             else:
-                new_grid[nr, nc] = 6  
+                _set(new_grid, nr, nc, 6)
+                births[6] += 1
+            if target != 0:
+                deaths[target] += 1
             smoke_timer[nr, nc] = SMOKE_LIFETIME
-            new_grid[r, c] = 0 
+            _set(new_grid, r, c, 0)
+            deaths[3] += 1
             moved = True
             break
     if not moved:
-        new_grid[r, c] = 3
+        _set(new_grid, r, c, 3)
+
+def rebuild_frontier(grid):
+    """Ponovno zgradi fronto gorenja s pregledom celotne mreže."""
+    burning.clear()
+    burning.update(zip(*(idx.tolist() for idx in np.nonzero(grid == 3))))
+
+def collect_igniting(old_grid, front):
+    """
+    Poišče les, ki se bo v tej generaciji vžgal: vse celice z lesom (4) ob katerikoli goreči celici.
+    Pregledajo se le sosedje celic na fronti, ne celotna mreža.
+
+    Args:
+        old_grid (numpy.ndarray): trenutna mreža pred posodobitvijo
+        front (list): položaji gorečih celic (r, c)
+    """
+    rows, cols = old_grid.shape
+    _igniting.clear()
+    for (r, c) in front:
+        for dr in [-1, 0, 1]:
+            for dc in [-1, 0, 1]:
+                rr = r + dr
+                cc = c + dc
+                if 0 <= rr < rows and 0 <= cc < cols and old_grid[rr, cc] == 4:
+                    _igniting.add((rr, cc))
 
 def update_wood(old_grid, new_grid, r, c):
     """
     Posodobi celico z lesom (vrednost 4).
     Pravila:
       - Če je neposredno pod lesom voda (7), les ostane nespremenjen.
-      - Če kateri izmed sosednjih (vse smeri) celic vsebuje ogenj (3), se les spremeni v ogenj.
+      - Če kateri izmed sosednjih (vse smeri) celic vsebuje ogenj (3), se les spremeni v ogenj
+        (to vnaprej določi collect_igniting iz fronte gorenja).
       - Če spodnja celica (pod lesom) je prazna, se les premakne navzdol (simulira gravitacijo).
       - V nasprotnem primeru les ostane na mestu.
       
@@ -101,24 +240,20 @@ def update_wood(old_grid, new_grid, r, c):
     """
     rows, cols = old_grid.shape
     if r + 1 < rows and old_grid[r+1, c] == 7:
-        new_grid[r, c] = 4
+        _set(new_grid, r, c, 4)
+        return
+    if (r, c) in _igniting:
+        _set(new_grid, r, c, 3)
+        deaths[4] += 1
+        births[3] += 1
         return
-    for dr in [-1, 0, 1]:
-        for dc in [-1, 0, 1]:
-            if dr == 0 and dc == 0:
-                continue  
-            rr = r + dr
-            cc = c + dc
-            if 0 <= rr < rows and 0 <= cc < cols:
-                if old_grid[rr, cc] == 3:
-                    new_grid[r, c] = 3
-                    return
     below = r + 1
     if below < rows and old_grid[below, c] == 0:
-        new_grid[below, c] = 4
-        new_grid[r, c] = 0
+        _set(new_grid, below, c, 4)
+        _set(new_grid, r, c, 0)
+        moves[4] += 1
     else:
-        new_grid[r, c] = 4
+        _set(new_grid, r, c, 4)
 
 def update_smoke(old_grid, new_grid, r, c):
     """
@@ -131,7 +266,8 @@ def update_smoke(old_grid, new_grid, r, c):
     rows, cols = old_grid.shape
     current_lifetime = smoke_timer[r, c]
     if current_lifetime <= 0:
-        new_grid[r, c] = 0
+        _set(new_grid, r, c, 0)
+        deaths[old_grid[r, c]] += 1
         return
     new_lifetime = current_lifetime - 1  
     upward_candidates = []
@@ -142,10 +278,11 @@ def update_smoke(old_grid, new_grid, r, c):
             if old_grid[nr, nc] == 0:
                 upward_candidates.append((nr, nc))
     if upward_candidates:
-        nr, nc = random.choice(upward_candidates)
-        new_grid[nr, nc] = old_grid[r, c]
+        nr, nc = choice(upward_candidates, _noise[RNG_SMOKE][r, c])
+        _set(new_grid, nr, nc, old_grid[r, c])
         smoke_timer[nr, nc] = new_lifetime
-        new_grid[r, c] = 0
+        _set(new_grid, r, c, 0)
+        moves[old_grid[r, c]] += 1
     else:
         side_candidates = []
         for dc in [-1, 1]:
@@ -153,12 +290,13 @@ def update_smoke(old_grid, new_grid, r, c):
             if 0 <= nc < cols and old_grid[r, nc] == 0:
                 side_candidates.append((r, nc))
         if side_candidates:
-            nr, nc = random.choice(side_candidates)
-            new_grid[nr, nc] = old_grid[r, c]
+            nr, nc = choice(side_candidates, _noise[RNG_SMOKE][r, c])
+            _set(new_grid, nr, nc, old_grid[r, c])
             smoke_timer[nr, nc] = new_lifetime
-            new_grid[r, c] = 0
+            _set(new_grid, r, c, 0)
+            moves[old_grid[r, c]] += 1
         else:
-            new_grid[r, c] = old_grid[r, c]
+            _set(new_grid, r, c, old_grid[r, c])
             smoke_timer[r, c] = new_lifetime
 
 def update_water(old_grid, new_grid, r, c):
@@ -188,8 +326,9 @@ def update_water(old_grid, new_grid, r, c):
         if flow > 0:
             water_levels[r+1, c] += flow
             water_levels[r, c] -= flow
-            new_grid[r+1, c] = 7  
-            new_grid[r, c] = 7 if water_levels[r, c] > 0 else 0
+            _set(new_grid, r+1, c, 7)
+            _set(new_grid, r, c, 7 if water_levels[r, c] > 0 else 0)
+            moves[7] += 1
             return
     for dc in [-1, 1]:
         nc = c + dc
@@ -203,8 +342,9 @@ def update_water(old_grid, new_grid, r, c):
                 if share > 0:
                     water_levels[r, nc] += share
                     water_levels[r, c] -= share
-                    new_grid[r, nc] = 7
-                    new_grid[r, c] = 7 if water_levels[r, c] > 0 else 0
+                    _set(new_grid, r, nc, 7)
+                    _set(new_grid, r, c, 7 if water_levels[r, c] > 0 else 0)
+                    moves[7] += 1
     if water_levels[r, c] > 1.0 and r - 1 >= 0:
         if old_grid[r-1, c] in (0, 7):
             if old_grid[r-1, c] == 7:
@@ -215,8 +355,9 @@ def update_water(old_grid, new_grid, r, c):
             if flow > 0:
                 water_levels[r-1, c] += flow
                 water_levels[r, c] -= flow
-                new_grid[r-1, c] = 7
-                new_grid[r, c] = 7 if water_levels[r, c] > 0 else 0
+                _set(new_grid, r-1, c, 7)
+                _set(new_grid, r, c, 7 if water_levels[r, c] > 0 else 0)
+                moves[7] += 1
 
 def update_balloon(old_grid, new_grid, r, c):
     """
@@ -233,30 +374,60 @@ def update_balloon(old_grid, new_grid, r, c):
         nr, nc = r - 1, c + dc
         if 0 <= nr < rows and 0 <= nc < cols:
             candidates.append((nr, nc))
-    random.shuffle(candidates) 
+    candidates = shuffled(candidates, _noise[RNG_BALLOON][r, c])
     for (nr, nc) in candidates:
         if old_grid[nr, nc] == 0:
-            new_grid[nr, nc] = 8
-            new_grid[r, c] = 0
+            _set(new_grid, nr, nc, 8)
+            _set(new_grid, r, c, 0)
+            moves[8] += 1
             return
         else:
-            new_grid[r, c] = 0
+            _set(new_grid, r, c, 0)
+            deaths[8] += 1
             return
-    new_grid[r, c] = 8
+    _set(new_grid, r, c, 8)
+
+def grid_to_rgb(block, level=0, r0=0, c0=0):
+    """
+    Pretvori izrez mreže v RGB sliko (uint8) z barvami iz BASE_COLOR_MAP.
+    Na nivoju 0 se voda (stanje 7) pobarva s prelivom glede na količino vode v water_levels,
+    na pomanjšanih nivojih pa z osnovno barvo vode.
 
-def draw_grid(screen, grid):
+    Args:
+        block (numpy.ndarray): izrez mreže ali nivoja s stanji celic
+        level (int): nivo podrobnosti (0 = polna ločljivost)
+        r0, c0 (int): levi zgornji kot izreza v mreži
+    """
+    rgb = _base_colorize(block, level, r0, c0)
+    if level == 0:
+        rows, cols = block.shape
+        water = block == 7
+        if water.any():
+            t = np.minimum(water_levels[r0:r0 + rows, c0:c0 + cols][water], 2.0) / 2.0
+            rgb[water, 0] = (173 * (1 - t)).astype(np.uint8)
+            rgb[water, 1] = (216 * (1 - t)).astype(np.uint8)
+            rgb[water, 2] = (230 * (1 - t) + 139 * t).astype(np.uint8)
+    return rgb
+
+def draw_grid(screen, grid, viewport=None):
     """
     Nariše trenutno stanje mreže na zaslon z uporabo pygame.
     Pravila risanja:
       - Prazne celice se ne rišejo (ostanejo črne oz. barve ozadja).
       - Za celice, ki niso prazne, se nariše pravokotnik s pripadajočo barvo.
       - Poseben način barvanja se uporabi za vodo (celice s stanjem 7), kjer barva odseva količino vode.
+      - Če je podan viewport, se nariše le vidni del mreže (s premikom in povečavo).
       
     Args:
         screen (pygame.Surface): zaslon, na katerega risemo
         grid (numpy.ndarray): trenutna mreža s stanji celic
+        viewport (Viewport): pogled na mrežo (neobvezno)
     """
     screen.fill(BLACK) 
+    if viewport is not None:
+        viewport.draw(screen, grid, grid_to_rgb)
+        pygame.display.flip()
+        return
     rows, cols = grid.shape
 
     for r in range(rows):
@@ -283,6 +454,7 @@ def draw_info(screen, generation, selected_state):
     Nariše informacijski pas na vrhu zaslona, ki prikazuje:
       - Trenutno generacijo simulacije
       - Trenutno izbrano stanje (npr. ognj, pesek, les, voda, balon)
+      - Sparkline števila celic izbranega materiala (pri vodi skupne količine vode) skozi čas
       - Meni s kratkimi navodili za izbiro stanj
     """
     info_surface = pygame.Surface((WIDTH, 50))
@@ -296,6 +468,16 @@ def draw_info(screen, generation, selected_state):
     state_names = {2: "SAND", 3: "FIRE", 4: "WOOD", 7: "WATER", 8: "BALLOON"}
     sel_text = info_font.render(f"Selected: {state_names.get(selected_state, '')}", True, WHITE)
     screen.blit(sel_text, (10, 25))
+
+    if selected_state == 7:
+        series_name = "water_volume"
+    else:
+        series_name = f"count_{MATERIAL_NAMES[selected_state]}"
+    values = history.series(series_name, last=STATS_SPARKLINE_POINTS)
+    draw_sparkline(screen, values, (170, 8, STATS_SPARKLINE_POINTS, 34), WHITE, background=(30, 30, 30))
+    if len(values):
+        value_text = info_font.render(f"{series_name}: {values[-1]:g}", True, WHITE)
+        screen.blit(value_text, (180 + STATS_SPARKLINE_POINTS, 15))
     
     menu_text_lines = [
         "1  ->  FIRE",
@@ -326,24 +508,42 @@ def mouse_to_grid_pos(mx, my):
     r = my // CELL_SIZE
     return r, c
 
-def next_generation(grid):
+def next_generation(grid, generation=None):
     """
     Ustvari novo generacijo mreže tako, da uporabi pravila za vse različne tipe celic.
     Postopek:
-      1. Najprej posodobi ogenj.
+      1. Najprej posodobi ogenj (le celice na fronti gorenja, v vrstnem redu po vrsticah).
       2. Nato posodobi dim.
       3. Sledi posodobitev peska (od spodaj navzgor, da se simulira gravitacija).
       4. Posodobi les.
       5. Posodobi vodo.
       6. Na koncu posodobi balon.
+    Naključna števila za vse celice se za to generacijo izračunajo vnaprej (po eno polje za vsak namen).
+    Če generation ni podan, se uporabi notranji števec generacij.
+    Vzorec statistike se ne shrani; to stori klicatelj z record_stats(), ko generacijo sprejme.
+    Fronta gorenja se prevzame iz prejšnjega klica, če je 'grid' mreža, ki jo je ta vrnil; sicer se
+    zgradi znova iz mreže. Spremembe vrnjene mreže morajo zato iti prek paint_cell ali _set,
+    neposreden zapis (grid[r, c] = 3) ogenj ne doda na fronto.
     """
+    global generation_counter, _last_grid
+    if grid is not _last_grid:
+        rebuild_frontier(grid)
+    if generation is None:
+        generation = generation_counter
+    generation_counter = generation + 1
     rows, cols = grid.shape
+    for purpose in (RNG_SAND, RNG_FIRE, RNG_SMOKE, RNG_BALLOON):
+        _noise[purpose] = rng.field(generation, purpose, (rows, cols))
     new_grid = np.copy(grid)
+    changed_cells.clear()
+    moves[:] = 0
+    births[:] = 0
+    deaths[:] = 0
 
-    for r in range(rows):
-        for c in range(cols):
-            if grid[r, c] == 3:
-                update_fire(grid, new_grid, r, c)
+    front = sorted(burning)
+    collect_igniting(grid, front)
+    for (r, c) in front:
+        update_fire(grid, new_grid, r, c)
 
     for r in range(rows):
         for c in range(cols):
@@ -369,6 +569,7 @@ def next_generation(grid):
         for c in range(cols):
             if grid[r, c] == 8:
                 update_balloon(grid, new_grid, r, c)
+    _last_grid = new_grid
     return new_grid
 
 def update_balloon(old_grid, new_grid, r, c):
@@ -382,16 +583,18 @@ def update_balloon(old_grid, new_grid, r, c):
         nr, nc = r - 1, c + dc
         if 0 <= nr < rows and 0 <= nc < cols:
             candidates.append((nr, nc))
-    random.shuffle(candidates)
+    candidates = shuffled(candidates, _noise[RNG_BALLOON][r, c])
     for (nr, nc) in candidates:
         if old_grid[nr, nc] == 0:
-            new_grid[nr, nc] = 8
-            new_grid[r, c] = 0
+            _set(new_grid, nr, nc, 8)
+            _set(new_grid, r, c, 0)
+            moves[8] += 1
             return
         else:
-            new_grid[r, c] = 0
+            _set(new_grid, r, c, 0)
+            deaths[8] += 1
             return
-    new_grid[r, c] = 8
+    _set(new_grid, r, c, 8)
 
 def run_simulation_2D():
     """
@@ -404,17 +607,25 @@ def run_simulation_2D():
       - Vsaki iteraciji posodobi mrežo z uporabo pravil iz next_generation.
       - Če mreža doseže stabilno stanje (brez sprememb), simulacija se začasno ustavi.
     """
-    global selected_state
+    global selected_state, screen
+    screen = pygame.display.get_surface()
+    if screen is None:
+        pygame.init()
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("2D Cellular Automata: Wall/Sand/Fire/Wood/Smoke/Water/Balloon")
     grid = create_initial_grid(ROWS, COLS, INITIAL_LIVE_RATIO, INITIAL_SAND_RATIO)
     static_walls = (grid == 1)
     generation = 0
     running = True
     paused = False
     selected_state = 3  
+    viewport = Viewport(ROWS, COLS, mode="majority")
     
     while running:
         clock.tick(FPS)  
         for event in pygame.event.get():
+            if viewport.handle_event(event):
+                continue
             if event.type == pygame.QUIT:
                 running = False
                 return
@@ -432,23 +643,25 @@ def run_simulation_2D():
                     selected_state = 7  
                 elif event.key == pygame.K_5:
                     selected_state = 8  
+                elif event.key == pygame.K_s:
+                    history.to_csv("twod_stats.csv")
+                    print(f"Statistics for {len(history)} generations saved to twod_stats.csv")
                 elif paused:
                     paused = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:
                     mx, my = event.pos
-                    r, c = mouse_to_grid_pos(mx, my)
+                    r, c = viewport.screen_to_grid(mx, my)
                     if 0 <= r < ROWS and 0 <= c < COLS:
-                        grid[r, c] = selected_state
-                        if selected_state == 7:
-                            water_levels[r, c] = 1.0
+                        paint_cell(grid, r, c, selected_state)
+                        viewport.mark_dirty(r, r + 1, c, c + 1)
                     if paused:
                         paused = False
 
-        draw_grid(screen, grid)
+        draw_grid(screen, grid, viewport)
         draw_info(screen, generation, selected_state)
-        new_grid = next_generation(grid)
-        new_grid[static_walls] = 1
+        new_grid = next_generation(grid, generation)
+        restore_walls(new_grid, static_walls)
         
         if np.array_equal(new_grid, grid):
             if not paused:
@@ -459,4 +672,6 @@ def run_simulation_2D():
 
         if not paused:
             generation += 1
+            record_stats()
+            viewport.track(new_grid, grid, regions=cell_regions(changed_cells))
             grid = new_grid
\ No newline at end of file
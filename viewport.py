@@ -0,0 +1,316 @@
+import math
+import pygame
+import numpy as np
+from constants import (
+    WIDTH, HEIGHT, CELL_SIZE,
+    VIEW_PAN_STEP, VIEW_ZOOM_STEP, VIEW_MAX_CELL_PX, MIPMAP_TILE
+)
+
+
+def _reduce_density(src, first):
+    """
+    Zmanjša nivo za faktor 2 in vrne gostoto živih celic (0-255) v bloku 2x2.
+    Na prvem nivoju je vir kar mreža (0/1 ali material), zato štejemo neprazne celice.
+    """
+    if first:
+        values = (src != 0).astype(np.uint16) * 255
+    else:
+        values = src.astype(np.uint16)
+    h, w = values.shape
+    if h % 2 or w % 2:
+        values = np.pad(values, ((0, h % 2), (0, w % 2)))
+    total = values[0::2, 0::2] + values[1::2, 0::2] + values[0::2, 1::2] + values[1::2, 1::2]
+    return (total // 4).astype(np.uint8)
+
+
+def _reduce_majority(src, first):
+    """
+    Zmanjša nivo za faktor 2 in vrne prevladujoči material v bloku 2x2.
+    Pri izenačenju ima prednost neprazen material, da tanke strukture ne izginejo.
+    """
+    values = src.astype(np.uint8)
+    h, w = values.shape
+    if h % 2 or w % 2:
+        values = np.pad(values, ((0, h % 2), (0, w % 2)))
+    stack = np.stack([values[0::2, 0::2], values[1::2, 0::2], values[0::2, 1::2], values[1::2, 1::2]])
+    votes = (stack[:, None] == stack[None, :]).sum(axis=1) * 2 + (stack != 0)
+    best = votes.argmax(axis=0)
+    return np.take_along_axis(stack, best[None], axis=0)[0]
+
+
+def mask_regions(changed, tile=MIPMAP_TILE):
+    """
+    Iz maske sprememb (bool, oblike mreže) vrne pravokotnike (r0, r1, c0, c1) spremenjenih ploščic:
+    za vsak pas ploščic en pravokotnik od prve do zadnje spremenjene ploščice.
+    """
+    rows, cols = changed.shape
+    pad_r, pad_c = -rows % tile, -cols % tile
+    if pad_r or pad_c:
+        changed = np.pad(changed, ((0, pad_r), (0, pad_c)))
+    bands = changed.reshape(-1, tile, cols + pad_c).any(axis=1)
+    tiles = bands.reshape(bands.shape[0], -1, tile).any(axis=2)
+    regions = []
+    for band in np.nonzero(tiles.any(axis=1))[0]:
+        hit = np.nonzero(tiles[band])[0]
+        regions.append((band * tile, (band + 1) * tile, hit[0] * tile, (hit[-1] + 1) * tile))
+    return regions
+
+
+def cell_regions(cells, tile=MIPMAP_TILE):
+    """Enako kot mask_regions, a iz seznama spremenjenih celic (r, c) brez pregleda celotne mreže."""
+    bands = {}
+    for r, c in cells:
+        band, t = r // tile, c // tile
+        lo, hi = bands.get(band, (t, t))
+        bands[band] = (min(lo, t), max(hi, t))
+    return [(band * tile, (band + 1) * tile, lo * tile, (hi + 1) * tile)
+            for band, (lo, hi) in bands.items()]
+
+
+class MipmapPyramid:
+    """
+    Predpomnjeni nivoji pomanjšane mreže (nivo k ima celice velikosti 2^k x 2^k).
+    - mode "density": nivoji hranijo delež nepraznih celic (uint8, 0-255).
+    - mode "majority": nivoji hranijo prevladujoči material (uint8).
+    Nivo 0 je kar sama mreža. Ob spremembah se ponovno izračunajo le umazane ploščice.
+    """
+
+    def __init__(self, grid, mode="density", tile=MIPMAP_TILE):
+        self.mode = mode
+        self.tile = tile
+        self._reduce = _reduce_density if mode == "density" else _reduce_majority
+        self.rebuild(grid)
+
+    def rebuild(self, grid):
+        self.levels = [grid]
+        while max(self.levels[-1].shape) > 1:
+            self.levels.append(self._reduce(self.levels[-1], len(self.levels) == 1))
+        self._dirty = set()
+
+    @property
+    def shape(self):
+        return self.levels[0].shape
+
+    def set_grid(self, grid):
+        """Zamenja mrežo na nivoju 0 (iste oblike) brez ponovnega računanja nivojev."""
+        if grid.shape != self.shape:
+            self.rebuild(grid)
+        else:
+            self.levels[0] = grid
+
+    def mark_dirty(self, r0, r1, c0, c1):
+        """Označi pravokotnik [r0, r1) x [c0, c1) na nivoju 0 kot spremenjen."""
+        rows, cols = self.shape
+        r0, c0 = max(0, r0), max(0, c0)
+        r1, c1 = min(rows, r1), min(cols, c1)
+        if r0 < r1 and c0 < c1:
+            self._dirty.add((r0, r1, c0, c1))
+
+    def mark_all_dirty(self):
+        rows, cols = self.shape
+        self.mark_dirty(0, rows, 0, cols)
+
+    def mark_changed(self, old_grid, new_grid):
+        """
+        Primerja dve zaporedni mreži in označi ploščice, v katerih se je kaj spremenilo.
+        Za vsak pas ploščic se označi en pravokotnik od prve do zadnje spremenjene ploščice.
+        """
+        for region in mask_regions(old_grid != new_grid, self.tile):
+            self.mark_dirty(*region)
+
+    def refresh(self):
+        """Ponovno izračuna vse nivoje nad umazanimi pravokotniki."""
+        if not self._dirty:
+            return
+        regions = self._dirty
+        for k in range(1, len(self.levels)):
+            src = self.levels[k - 1]
+            dst = self.levels[k]
+            next_regions = set()
+            for (r0, r1, c0, c1) in regions:
+                a0, a1 = r0 // 2, min(dst.shape[0], -(-r1 // 2))
+                b0, b1 = c0 // 2, min(dst.shape[1], -(-c1 // 2))
+                block = src[2 * a0:2 * a1, 2 * b0:2 * b1]
+                dst[a0:a1, b0:b1] = self._reduce(block, k == 1)
+                next_regions.add((a0, a1, b0, b1))
+            regions = next_regions
+        self._dirty = set()
+
+
+def density_colorizer(fg, bg):
+    """
+    Vrne funkcijo za barvanje nivojev v načinu "density":
+    nivo 0 pobarva celice z vrednostjo 1 z barvo fg, višje nivoje pa z mešanico bg in fg glede na gostoto.
+    """
+    fg = np.array(fg, dtype=np.float32)
+    bg = np.array(bg, dtype=np.float32)
+
+    def colorize(block, level, r0, c0):
+        if level == 0:
+            t = (block == 1).astype(np.float32)
+        else:
+            t = block.astype(np.float32) / 255.0
+        return (bg + (fg - bg) * t[..., None]).astype(np.uint8)
+    return colorize
+
+
+def palette_colorizer(color_map):
+    """Vrne funkcijo, ki materiale pobarva s paleto iz slovarja {stanje: barva}."""
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    for state, color in color_map.items():
+        palette[state] = color
+
+    def colorize(block, level, r0, c0):
+        return palette[block]
+    return colorize
+
+
+class Viewport:
+    """
+    Pogled na mrežo, ki je lahko večja od okna.
+    - x, y: levi zgornji kot pogleda v koordinatah celic (lahko decimalno).
+    - cell_px: velikost ene celice v pikslih (povečava); pod 1 se riše iz pomanjšanih nivojev.
+    Upravljanje: puščice premikajo pogled, +/- ali kolesce miške povečuje, desni gumb vleče.
+    """
+
+    def __init__(self, rows, cols, width=WIDTH, height=HEIGHT, cell_px=CELL_SIZE, mode="density"):
+        self.rows = rows
+        self.cols = cols
+        self.width = width
+        self.height = height
+        self.cell_px = float(cell_px)
+        self.x = 0.0
+        self.y = 0.0
+        self.mode = mode
+        self.pyramid = None
+        self._dragging = False
+
+    def min_cell_px(self):
+        """Najmanjša povečava, pri kateri je cela mreža vidna vsaj na polovici okna."""
+        return min(self.width / self.cols, self.height / self.rows, 1.0) / 2
+
+    def screen_to_grid(self, mx, my):
+        c = math.floor(self.x + mx / self.cell_px)
+        r = math.floor(self.y + my / self.cell_px)
+        return r, c
+
+    def pan(self, dx_px, dy_px):
+        self.x += dx_px / self.cell_px
+        self.y += dy_px / self.cell_px
+        self._clamp()
+
+    def zoom_at(self, factor, mx, my):
+        """Spremeni povečavo tako, da celica pod kazalcem (mx, my) ostane na mestu."""
+        wx = self.x + mx / self.cell_px
+        wy = self.y + my / self.cell_px
+        self.cell_px = min(VIEW_MAX_CELL_PX, max(self.min_cell_px(), self.cell_px * factor))
+        self.x = wx - mx / self.cell_px
+        self.y = wy - my / self.cell_px
+        self._clamp()
+
+    def _clamp(self):
+        view_cols = self.width / self.cell_px
+        view_rows = self.height / self.cell_px
+        self.x = min(max(self.x, min(0.0, self.cols - view_cols)), max(0.0, self.cols - view_cols))
+        self.y = min(max(self.y, min(0.0, self.rows - view_rows)), max(0.0, self.rows - view_rows))
+
+    def level(self):
+        """Izbere nivo podrobnosti, pri katerem je celica nivoja velika vsaj en piksel."""
+        if self.cell_px >= 1:
+            return 0
+        k = int(math.ceil(math.log2(1.0 / self.cell_px)))
+        if self.pyramid is not None:
+            k = min(k, len(self.pyramid.levels) - 1)
+        return k
+
+    def handle_event(self, event):
+        """
+        Obdela dogodke za premikanje in povečavo.
+        Vrne True, če je bil dogodek porabljen in ga klicatelj ne sme več obravnavati.
+        """
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_LEFT:
+                self.pan(-VIEW_PAN_STEP, 0)
+            elif event.key == pygame.K_RIGHT:
+                self.pan(VIEW_PAN_STEP, 0)
+            elif event.key == pygame.K_UP:
+                self.pan(0, -VIEW_PAN_STEP)
+            elif event.key == pygame.K_DOWN:
+                self.pan(0, VIEW_PAN_STEP)
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                self.zoom_at(VIEW_ZOOM_STEP, self.width // 2, self.height // 2)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.zoom_at(1 / VIEW_ZOOM_STEP, self.width // 2, self.height // 2)
+            else:
+                return False
+            return True
+        if event.type == pygame.MOUSEWHEEL:
+            mx, my = pygame.mouse.get_pos()
+            self.zoom_at(VIEW_ZOOM_STEP ** event.y, mx, my)
+            return True
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button in (3, 4, 5):
+            self._dragging = event.button == 3
+            return True
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+            self._dragging = False
+            return True
+        if event.type == pygame.MOUSEMOTION and self._dragging:
+            dx, dy = event.rel
+            self.pan(-dx, -dy)
+            return True
+        return False
+
+    def track(self, grid, previous=None, regions=None):
+        """
+        Sporoči pogledu novo stanje mreže.
+        Če je podana prejšnja mreža, se na nivojih osvežijo le spremenjene ploščice.
+        Primerjava mrež je sorazmerna velikosti mreže (pri 16384 x 16384 okoli 170 ms), zato lahko
+        klicatelj, ki spremembe že pozna, namesto tega poda seznam pravokotnikov (r0, r1, c0, c1).
+        """
+        if self.pyramid is None or self.pyramid.shape != grid.shape:
+            self.rows, self.cols = grid.shape
+            self.pyramid = MipmapPyramid(grid, self.mode)
+            return
+        self.pyramid.set_grid(grid)
+        if regions is not None:
+            for region in regions:
+                self.pyramid.mark_dirty(*region)
+        elif previous is not None and previous.shape == grid.shape:
+            self.pyramid.mark_changed(previous, grid)
+        else:
+            self.pyramid.mark_all_dirty()
+
+    def mark_dirty(self, r0, r1, c0, c1):
+        if self.pyramid is not None:
+            self.pyramid.mark_dirty(r0, r1, c0, c1)
+
+    def draw(self, screen, grid, colorize):
+        """
+        Nariše vidni del mreže.
+        colorize(block, level, r0, c0) vrne RGB sliko (uint8) za izrez nivoja z levim zgornjim kotom (r0, c0).
+        """
+        if self.pyramid is None or self.pyramid.levels[0] is not grid:
+            self.track(grid)
+        self.pyramid.refresh()
+        k = self.level()
+        level = self.pyramid.levels[k]
+        scale = 1 << k
+
+        c0 = max(0, int(math.floor(self.x)))
+        r0 = max(0, int(math.floor(self.y)))
+        c1 = min(self.cols, int(math.ceil(self.x + self.width / self.cell_px)))
+        r1 = min(self.rows, int(math.ceil(self.y + self.height / self.cell_px)))
+        lc0, lr0 = c0 // scale, r0 // scale
+        lc1 = min(level.shape[1], -(-c1 // scale))
+        lr1 = min(level.shape[0], -(-r1 // scale))
+        if lc0 >= lc1 or lr0 >= lr1:
+            return
+
+        rgb = colorize(level[lr0:lr1, lc0:lc1], k, lr0, lc0)
+        surface = pygame.surfarray.make_surface(np.ascontiguousarray(rgb.swapaxes(0, 1)))
+        left = int(round((lc0 * scale - self.x) * self.cell_px))
+        top = int(round((lr0 * scale - self.y) * self.cell_px))
+        right = int(round((lc1 * scale - self.x) * self.cell_px))
+        bottom = int(round((lr1 * scale - self.y) * self.cell_px))
+        surface = pygame.transform.scale(surface, (max(1, right - left), max(1, bottom - top)))
+        screen.blit(surface, (left, top))